@@ -0,0 +1,270 @@
+# Standard Library
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import (
+	date,
+	timedelta,
+)
+
+# Third Party Library
+import orjson
+from sqlalchemy import (
+	func,
+	select,
+	text,
+)
+
+# Application Library
+from benchmarks.harness import percentile
+from fastapi_common.db import (
+	MAX_BIND_PARAMS,
+	create_session,
+	init_db,
+	transaction,
+)
+from src.conf import settings
+from src.crud.analytics import analytics_crud
+from src.crud.product import product_crud
+from src.models import (
+	OrderItem,
+	Product,
+)
+
+PRODUCT_PREFIX = 'analytics-benchmark-'
+
+# Two lines per order on neighbouring products, spread over the last
+# :days days, priced from the product like create_order does.
+SEED_ORDERS = text("""
+	WITH new_orders AS (
+		INSERT INTO orders (created_at, status, total_amount, item_count)
+		SELECT
+			timezone('utc', now()) - random() * :days * interval '1 day',
+			'DELIVERED',
+			0,
+			0
+		FROM generate_series(1, :orders)
+		RETURNING id
+	), lines AS (
+		SELECT id AS order_id, floor(random() * :products)::int AS k
+		FROM new_orders
+	), items AS (
+		INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+		SELECT
+			lines.order_id,
+			products.id,
+			1 + floor(random() * 4)::int,
+			products.price
+		FROM lines
+		CROSS JOIN LATERAL (
+			VALUES (lines.k), ((lines.k + 1) % :products)
+		) AS pick (position)
+		JOIN products
+			ON products.id = (CAST(:product_ids AS integer[]))[pick.position + 1]
+		RETURNING order_id, quantity, unit_price
+	)
+	UPDATE orders
+	SET total_amount = totals.total_amount, item_count = totals.item_count
+	FROM (
+		SELECT order_id,
+			round(sum(unit_price * quantity)::numeric, 2) AS total_amount,
+			sum(quantity) AS item_count
+		FROM items
+		GROUP BY order_id
+	) AS totals
+	WHERE orders.id = totals.order_id
+""")
+
+# What the dashboards ran before the rollups existed.
+ADHOC_TOP_PRODUCTS = text("""
+	SELECT order_items.product_id,
+		sum(order_items.quantity) AS quantity,
+		sum(order_items.unit_price * order_items.quantity) AS revenue
+	FROM order_items
+	JOIN orders ON orders.id = order_items.order_id
+	WHERE orders.created_at >= timezone('utc', now()) - interval '30 days'
+	GROUP BY order_items.product_id
+	ORDER BY revenue DESC
+	LIMIT 10
+""")
+
+
+async def seed_products(
+	products: int
+) -> list:
+	async with create_session() as session:
+		product_ids = (await session.execute(
+			select(Product.id).where(
+				Product.name.startswith(PRODUCT_PREFIX)
+			).order_by(Product.id)
+		)).scalars().all()
+	if len(product_ids) >= products:
+		return product_ids[:products]
+
+	chunk_size = MAX_BIND_PARAMS // len(Product.__table__.columns)
+	for start in range(len(product_ids), products, chunk_size):
+		await product_crud.bulk_upsert([
+			{
+				'name': f'{PRODUCT_PREFIX}{index:06d}',
+				'description': None,
+				'price': round(random.uniform(1, 100), 2),
+				'stock_quantity': 10 ** 6,
+			}
+			for index in range(start, min(start + chunk_size, products))
+		])
+	return await seed_products(products)
+
+
+async def count_items() -> int:
+	async with create_session() as session:
+		return (await session.execute(
+			select(func.count()).select_from(OrderItem)
+		)).scalar()
+
+
+async def grow_history(
+	rows: int,
+	product_ids: list,
+	days: int,
+	chunk: int
+) -> float:
+	start = time.perf_counter()
+	missing = rows - await count_items()
+	while missing > 0:
+		orders = min(chunk, (missing + 1) // 2)
+		async with transaction() as session:
+			await session.execute(SEED_ORDERS, {
+				'orders': orders,
+				'days': days,
+				'products': len(product_ids),
+				'product_ids': product_ids,
+			})
+		missing -= orders * 2
+	return time.perf_counter() - start
+
+
+async def refresh(
+	batch_size: int
+) -> tuple:
+	start = time.perf_counter()
+	orders = total = 0
+	while True:
+		orders = await analytics_crud.refresh_rollups(
+			batch_size=batch_size,
+			settle_seconds=0
+		)
+		total += orders
+		if orders < batch_size:
+			return total, time.perf_counter() - start
+
+
+async def timed(
+	query,
+	repeat: int
+) -> dict:
+	await query()
+	timings = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		await query()
+		timings.append((time.perf_counter() - start) * 1000)
+	return {
+		'p50_ms': round(percentile(timings, 0.5), 3),
+		'p95_ms': round(percentile(timings, 0.95), 3),
+	}
+
+
+async def adhoc_top_products() -> list:
+	async with create_session() as session:
+		return (await session.execute(ADHOC_TOP_PRODUCTS)).all()
+
+
+async def run(
+	args: argparse.Namespace
+) -> list:
+	init_db(settings.database_dsn, **settings.engine_options)
+	random.seed(args.seed)
+	product_ids = await seed_products(args.products)
+
+	month_ago = date.today() - timedelta(days=30)
+	queries = {
+		'revenue_per_day': lambda: analytics_crud.revenue_per_day(),
+		'top_products': lambda: analytics_crud.top_products(
+			metric='revenue',
+			limit=10,
+			date_from=month_ago
+		),
+		'stock_velocity': lambda: analytics_crud.stock_velocity(
+			days=30,
+			limit=50
+		),
+	}
+	report = []
+	for rows in args.sizes:
+		seeded = await grow_history(
+			rows,
+			product_ids,
+			args.days,
+			args.chunk
+		)
+		rolled_up, refreshed = await refresh(args.batch_size)
+		result = {
+			'order_items': await count_items(),
+			'seed_seconds': round(seeded, 2),
+			'rolled_up_orders': rolled_up,
+			'refresh_seconds': round(refreshed, 2),
+		}
+		for name, query in queries.items():
+			result[name] = await timed(query, args.repeat)
+		if args.adhoc:
+			result['adhoc_top_products'] = await timed(
+				adhoc_top_products,
+				max(1, args.repeat // 10)
+			)
+		print(orjson.dumps(result).decode(), file=sys.stderr)
+		report.append(result)
+	return report
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description=(
+			'Grow order history in a scratch Postgres (POSTGRES_* settings, '
+			'migrated to head) and time the analytics rollup queries at '
+			'each size. Rows are added, never removed.'
+		)
+	)
+	parser.add_argument(
+		'--sizes',
+		type=lambda value: [int(size) for size in value.split(',')],
+		default=[10 ** 5, 10 ** 6, 10 ** 7],
+		help='comma separated order_items row counts'
+	)
+	parser.add_argument('--products', type=int, default=1000)
+	parser.add_argument('--days', type=int, default=365)
+	parser.add_argument('--chunk', type=int, default=100000)
+	parser.add_argument('--batch-size', type=int, default=10000)
+	parser.add_argument('--repeat', type=int, default=50)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument(
+		'--adhoc',
+		action='store_true',
+		help='also time the GROUP BY over order_items the rollups replace'
+	)
+	parser.add_argument('--output', help='write the JSON report here')
+	args = parser.parse_args()
+
+	report = orjson.dumps(
+		asyncio.run(run(args)),
+		option=orjson.OPT_INDENT_2
+	)
+	if args.output:
+		with open(args.output, 'wb') as output:
+			output.write(report)
+	sys.stdout.buffer.write(report + b'\n')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,216 @@
+# Standard Library
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+
+# Third Party Library
+import orjson
+
+# Application Library
+from benchmarks.harness import (
+	app_client,
+	percentile,
+	timed_request,
+)
+from fastapi_common.db import MAX_BIND_PARAMS
+from src.crud.product import (
+	order_crud,
+	product_crud,
+)
+from src.models.products import (
+	OrderStatus,
+	Product,
+)
+from src.schemas.product.crud import (
+	OrderCreate,
+	OrderItemCreate,
+)
+
+ENDPOINTS = (
+	'list_products',
+	'read_product',
+	'create_order',
+	'update_order',
+	'list_orders',
+)
+
+
+async def seed(
+	products: int,
+	orders: int,
+	concurrency: int
+) -> tuple:
+	# One statement binds at most MAX_BIND_PARAMS values.
+	chunk_size = MAX_BIND_PARAMS // len(Product.__table__.columns)
+	for start in range(0, products, chunk_size):
+		await product_crud.bulk_upsert([
+			{
+				'name': f'benchmark-{index:08d}',
+				'description': None,
+				'price': round(random.uniform(1, 100), 2),
+				'stock_quantity': 10 ** 9,
+			}
+			for index in range(start, min(start + chunk_size, products))
+		])
+	product_ids = [
+		product.id
+		for product in await product_crud.list(
+			model=Product,
+			order_by=(Product.id.desc(),),
+			limit=products
+		)
+	]
+
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async def create_order():
+		async with semaphore:
+			order = await order_crud.create_order(
+				OrderCreate(
+					status=OrderStatus.IN_PROGRESS,
+					items=[
+						OrderItemCreate(product_id=product_id, quantity=1)
+						for product_id in random.sample(product_ids, 3)
+					]
+				)
+			)
+			return order.id
+
+	order_ids = await asyncio.gather(*(create_order() for _ in range(orders)))
+	return product_ids, list(order_ids)
+
+
+def request_factory(
+	client,
+	endpoint: str,
+	product_ids: list,
+	order_ids: list
+):
+	if endpoint == 'list_products':
+		return lambda: client.get('/products/', params={'limit': 50})
+	if endpoint == 'read_product':
+		return lambda: client.get(f'/products/{random.choice(product_ids)}')
+	if endpoint == 'create_order':
+		return lambda: client.post('/orders/', json={
+			'status': OrderStatus.IN_PROGRESS.value,
+			'items': [
+				{'product_id': product_id, 'quantity': 1}
+				for product_id in random.sample(product_ids, 3)
+			],
+		})
+	if endpoint == 'update_order':
+		return lambda: client.put(
+			f'/orders/{random.choice(order_ids)}',
+			json={'items': [
+				{'product_id': product_id, 'quantity': random.randint(1, 5)}
+				for product_id in random.sample(product_ids, 2)
+			]}
+		)
+	if endpoint == 'list_orders':
+		return lambda: client.get('/orders/', params={'limit': 50})
+	raise ValueError(f'Unknown endpoint {endpoint}')
+
+
+async def run_endpoint(
+	send,
+	requests: int,
+	concurrency: int
+) -> dict:
+	latencies = []
+	queries = []
+	errors = 0
+	remaining = iter(range(requests))
+
+	async def worker():
+		nonlocal errors
+		for _ in remaining:
+			response, latency, query_count = await timed_request(send)
+			latencies.append(latency)
+			queries.append(query_count)
+			errors += response.status_code >= 400
+
+	start = time.perf_counter()
+	await asyncio.gather(*(worker() for _ in range(concurrency)))
+	elapsed = time.perf_counter() - start
+
+	return {
+		'requests': requests,
+		'errors': errors,
+		'seconds': round(elapsed, 4),
+		'throughput': round(requests / elapsed, 2),
+		'latency_ms': {
+			'p50': round(percentile(latencies, 0.50) * 1000, 3),
+			'p95': round(percentile(latencies, 0.95) * 1000, 3),
+			'p99': round(percentile(latencies, 0.99) * 1000, 3),
+		},
+		'queries_per_request': round(sum(queries) / len(queries), 2),
+	}
+
+
+async def run(
+	args: argparse.Namespace
+) -> dict:
+	random.seed(args.seed)
+	async with app_client() as client:
+		product_ids, order_ids = await seed(
+			args.products,
+			args.orders,
+			args.concurrency
+		)
+		results = {}
+		for endpoint in args.endpoints:
+			results[endpoint] = await run_endpoint(
+				request_factory(client, endpoint, product_ids, order_ids),
+				args.requests,
+				args.concurrency
+			)
+
+	return {
+		'started_at': datetime.utcnow().isoformat(),
+		'config': {
+			'products': args.products,
+			'orders': args.orders,
+			'requests': args.requests,
+			'concurrency': args.concurrency,
+			'seed': args.seed,
+		},
+		'endpoints': results,
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description=(
+			'Seed a local Postgres (POSTGRES_* settings, migrated to head) '
+			'and load-test the API in-process through httpx.'
+		)
+	)
+	parser.add_argument('--products', type=int, default=1000)
+	parser.add_argument('--orders', type=int, default=1000)
+	parser.add_argument('--requests', type=int, default=1000)
+	parser.add_argument('--concurrency', type=int, default=20)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument(
+		'--endpoints',
+		nargs='+',
+		choices=ENDPOINTS,
+		default=list(ENDPOINTS)
+	)
+	parser.add_argument('--output', help='write the JSON report here')
+	args = parser.parse_args()
+
+	report = orjson.dumps(
+		asyncio.run(run(args)),
+		option=orjson.OPT_INDENT_2
+	)
+	if args.output:
+		with open(args.output, 'wb') as output:
+			output.write(report)
+	sys.stdout.buffer.write(report + b'\n')
+
+
+if __name__ == '__main__':
+	main()
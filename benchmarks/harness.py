@@ -0,0 +1,73 @@
+# Standard Library
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import (
+	Awaitable,
+	Callable,
+	List,
+	Optional,
+)
+
+# Third Party Library
+import httpx
+from sqlalchemy import event
+
+# Application Library
+from fastapi_common.db import (
+	create_engine,
+	init_db,
+)
+from src.conf import settings
+from src.main import app
+
+_query_count: ContextVar[Optional[List[int]]] = ContextVar(
+	'benchmark_query_count',
+	default=None
+)
+
+
+def _count_query(*args, **kwargs) -> None:
+	counter = _query_count.get()
+	if counter is not None:
+		counter[0] += 1
+
+
+@asynccontextmanager
+async def app_client(
+	base_url: str = 'http://benchmark'
+):
+	init_db(settings.database_dsn, **settings.engine_options)
+	engine = create_engine(settings.database_dsn).sync_engine
+	if not event.contains(engine, 'before_cursor_execute', _count_query):
+		event.listen(engine, 'before_cursor_execute', _count_query)
+
+	async with httpx.AsyncClient(
+		transport=httpx.ASGITransport(app=app),
+		base_url=base_url,
+		timeout=None
+	) as client:
+		yield client
+
+
+async def timed_request(
+	send: Callable[[], Awaitable[httpx.Response]]
+) -> tuple:
+	# Statements are counted in the request's own context, so
+	# concurrent requests do not mix their counts.
+	counter = [0]
+	_query_count.set(counter)
+	start = time.perf_counter()
+	response = await send()
+	return response, time.perf_counter() - start, counter[0]
+
+
+def percentile(
+	values: List[float],
+	fraction: float
+) -> float:
+	if not values:
+		return 0.0
+	values = sorted(values)
+	index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+	return values[index]
@@ -0,0 +1,81 @@
+# Standard Library
+import argparse
+import asyncio
+import time
+from typing import List
+
+# Third Party Library
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import parse_obj_as
+
+# Application Library
+from fastapi_common.db import init_db
+from src.conf import settings
+from src.crud.product import order_crud
+from src.schemas.product.crud import OrderResponse
+
+
+async def orm_path(
+	limit: int
+) -> int:
+	orders = await order_crud.list_orders(
+		limit=limit,
+		offset=0,
+		order_by='created_at'
+	)
+	# What FastAPI does with response_model: validate again, encode.
+	validated = parse_obj_as(List[OrderResponse], orders)
+	body = ORJSONResponse(jsonable_encoder(validated)).body
+	return len(orders) if body else 0
+
+
+async def json_agg_path(
+	limit: int
+) -> int:
+	rows = await order_crud.list_orders_json(
+		limit=limit,
+		offset=0,
+		order_by='created_at'
+	)
+	body = b'[' + ','.join(row.json for row in rows).encode() + b']'
+	return len(rows) if body else 0
+
+
+async def measure(
+	path,
+	limit: int,
+	repeat: int
+) -> dict:
+	await path(limit)  # warm up the pool and statement caches
+	rows = 0
+	start = time.perf_counter()
+	for _ in range(repeat):
+		rows += await path(limit)
+	elapsed = time.perf_counter() - start
+	return {
+		'rows': rows,
+		'seconds': round(elapsed, 4),
+		'rows_per_second': round(rows / elapsed, 1),
+	}
+
+
+async def run(
+	args: argparse.Namespace
+) -> None:
+	init_db(settings.database_dsn, **settings.engine_options)
+	for name, path in (('orm', orm_path), ('json_agg', json_agg_path)):
+		print(name, await measure(path, args.limit, args.repeat))
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Compare ORM and json_agg order listing throughput.'
+	)
+	parser.add_argument('--limit', type=int, default=100)
+	parser.add_argument('--repeat', type=int, default=200)
+	asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,227 @@
+# Standard Library
+import argparse
+import asyncio
+import sys
+import time
+
+# Third Party Library
+import orjson
+from sqlalchemy import (
+	Integer,
+	cast,
+	func,
+	select,
+)
+from sqlalchemy.orm import selectinload
+
+# Application Library
+from benchmarks.harness import percentile
+from fastapi_common.db import (
+	create_session,
+	init_db,
+)
+from src.conf import settings
+from src.crud.product import (
+	order_crud,
+	product_crud,
+)
+from src.models import (
+	Order,
+	OrderItem,
+	Product,
+	ProductStockShard,
+)
+
+
+def _stock_by_ids(
+	product_ids: list
+):
+	sharded_stock = select(
+		cast(func.sum(ProductStockShard.quantity), Integer)
+	).where(
+		ProductStockShard.product_id == Product.id
+	).scalar_subquery()
+	return select(
+		Product.id,
+		func.coalesce(sharded_stock, Product.stock_quantity)
+	).where(Product.id.in_(product_ids))
+
+
+# Each named query next to the statement the CRUD layer built for the
+# same lookup on every call before it had one.
+QUERIES = (
+	(
+		product_crud,
+		'product_by_id',
+		lambda ids: product_crud.build_query(
+			model=Product,
+			conditions=(Product.id == ids['product_id'],)
+		),
+	),
+	(
+		product_crud,
+		'stock_by_ids',
+		lambda ids: _stock_by_ids(ids['product_ids']),
+	),
+	(
+		order_crud,
+		'order_by_id',
+		lambda ids: order_crud.build_query(
+			model=Order,
+			conditions=(Order.id == ids['order_id'],),
+			options=(selectinload(Order.items),)
+		),
+	),
+	(
+		order_crud,
+		'order_version_by_id',
+		lambda ids: select(Order.version).where(Order.id == ids['order_id']),
+	),
+	(
+		order_crud,
+		'items_by_order',
+		lambda ids: select(OrderItem).where(
+			OrderItem.order_id == ids['order_id']
+		).order_by(OrderItem.id),
+	),
+)
+
+PARAMS = {
+	'product_by_id': ('product_id',),
+	'stock_by_ids': ('product_ids',),
+	'order_by_id': ('order_id',),
+	'order_version_by_id': ('order_id',),
+	'items_by_order': ('order_id',),
+}
+
+
+def per_call_us(
+	call,
+	calls: int
+) -> float:
+	start = time.perf_counter()
+	for _ in range(calls):
+		call()
+	return (time.perf_counter() - start) / calls * 10 ** 6
+
+
+def statement_overhead(
+	ids: dict,
+	calls: int
+) -> dict:
+	# What runs in Python before SQLAlchemy can look the statement up
+	# in its compiled cache: building the select and its cache key.
+	report = {}
+	for crud, name, build in QUERIES:
+		report[name] = {
+			'built_us': round(per_call_us(
+				lambda: build(ids)._generate_cache_key(),
+				calls
+			), 2),
+			'named_us': round(per_call_us(
+				lambda: crud.named_query(name)._generate_cache_key(),
+				calls
+			), 2),
+		}
+	return report
+
+
+async def timed(
+	execute,
+	repeat: int
+) -> dict:
+	await execute()
+	timings = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		await execute()
+		timings.append((time.perf_counter() - start) * 1000)
+	return {
+		'p50_ms': round(percentile(timings, 0.5), 3),
+		'p95_ms': round(percentile(timings, 0.95), 3),
+	}
+
+
+async def execution_latency(
+	ids: dict,
+	repeat: int
+) -> dict:
+	report = {}
+	async with create_session() as session:
+		for crud, name, build in QUERIES:
+			params = {key: ids[key] for key in PARAMS[name]}
+			report[name] = {
+				'built': await timed(
+					lambda: session.execute(build(ids)),
+					repeat
+				),
+				'named': await timed(
+					lambda: crud.execute_named(name, session=session, **params),
+					repeat
+				),
+			}
+	return report
+
+
+async def pick_ids() -> dict:
+	async with create_session() as session:
+		product_ids = (await session.execute(
+			select(Product.id).order_by(Product.id).limit(10)
+		)).scalars().all()
+		order_id = (await session.execute(
+			select(OrderItem.order_id).order_by(OrderItem.order_id).limit(1)
+		)).scalar()
+	if not product_ids or order_id is None:
+		sys.exit('Seed at least one product and one order first.')
+	return {
+		'product_id': product_ids[0],
+		'product_ids': product_ids,
+		'order_id': order_id,
+	}
+
+
+async def run(
+	args: argparse.Namespace
+) -> dict:
+	if not args.execute:
+		return {
+			'statement_overhead': statement_overhead(
+				{'product_id': 1, 'product_ids': list(range(1, 11)), 'order_id': 1},
+				args.calls
+			),
+		}
+	init_db(settings.database_dsn, **settings.engine_options)
+	ids = await pick_ids()
+	return {
+		'statement_overhead': statement_overhead(ids, args.calls),
+		'execution': await execution_latency(ids, args.repeat),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description=(
+			'Compare the per-call Python cost of building the hot CRUD '
+			'statements against running the named, prebuilt ones. With '
+			'--execute also time both against the POSTGRES_* database.'
+		)
+	)
+	parser.add_argument('--calls', type=int, default=10000)
+	parser.add_argument(
+		'--execute',
+		action='store_true',
+		help='also run both variants against the database'
+	)
+	parser.add_argument('--repeat', type=int, default=1000)
+	args = parser.parse_args()
+
+	sys.stdout.buffer.write(
+		orjson.dumps(
+			asyncio.run(run(args)),
+			option=orjson.OPT_INDENT_2
+		) + b'\n'
+	)
+
+
+if __name__ == '__main__':
+	main()
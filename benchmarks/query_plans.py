@@ -0,0 +1,211 @@
+# Standard Library
+import asyncio
+import sys
+from datetime import datetime
+from typing import (
+	Iterator,
+	List,
+)
+
+# Third Party Library
+from sqlalchemy import (
+	Integer,
+	any_,
+	bindparam,
+	cast,
+	select,
+	text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import (
+	ClauseElement,
+	Executable,
+)
+
+# Application Library
+from fastapi_common.db import (
+	create_session,
+	init_db,
+)
+from src.conf import settings
+from src.crud.product import (
+	order_crud,
+	product_crud,
+)
+from src.models import (
+	Order,
+	OrderItem,
+	Product,
+)
+from src.models.products import OrderStatus
+from src.schemas.product.crud import ProductSearchMode
+
+
+def _search(
+	query: str,
+	mode: ProductSearchMode
+):
+	condition, rank = product_crud._search_condition(query, mode)
+	return select(Product.id, rank).where(condition).order_by(
+		rank.desc(),
+		Product.id
+	).limit(20)
+
+# Each hot query paired with the indexes it may use. Queries are built
+# like the CRUD layer builds them.
+CHECKS = (
+	(
+		'order items by order (selectinload)',
+		select(OrderItem).where(OrderItem.order_id.in_([1, 2, 3])),
+		('uq_order_items_order_id_product_id',),
+	),
+	(
+		'order item by order and product',
+		select(OrderItem).where(
+			OrderItem.order_id == 1,
+			OrderItem.product_id == 1
+		),
+		('uq_order_items_order_id_product_id',),
+	),
+	(
+		'order items by product',
+		select(OrderItem).where(OrderItem.product_id == 1),
+		('ix_order_items_product_id',),
+	),
+	(
+		'products listing by name',
+		order_crud.build_query(
+			model=Product,
+			order_by=(Product.name, Product.id),
+			limit=50
+		),
+		('ix_products_name_id',),
+	),
+	(
+		'orders listing by created_at',
+		order_crud.build_query(
+			model=Order,
+			order_by=(Order.created_at, Order.id),
+			limit=50
+		),
+		('ix_orders_created_at_id',),
+	),
+	(
+		'open orders by created_at',
+		order_crud.build_query(
+			model=Order,
+			conditions=order_crud._order_conditions([OrderStatus.IN_PROGRESS]),
+			order_by=(Order.created_at, Order.id),
+			limit=50
+		),
+		# Either works, the planner prefers the partial index once
+		# shipped and delivered orders dominate the table.
+		(
+			'ix_orders_in_progress_created_at_id',
+			'ix_orders_status_created_at_id',
+		),
+	),
+	(
+		'orders by status and created_at range',
+		order_crud.build_query(
+			model=Order,
+			conditions=order_crud._order_conditions(
+				[OrderStatus.SHIPPED, OrderStatus.DELIVERED],
+				created_from=datetime(2024, 1, 1)
+			),
+			order_by=(Order.created_at, Order.id),
+			limit=50
+		),
+		# Once the range covers most of the table, walking the
+		# created_at index and filtering on status is as good.
+		(
+			'ix_orders_status_created_at_id',
+			'ix_orders_created_at_id',
+		),
+	),
+	(
+		'products batch read by id list',
+		select(Product).where(
+			Product.id == any_(
+				cast(bindparam('product_ids', value=[1, 2, 3]), ARRAY(Integer))
+			)
+		),
+		('products_pkey',),
+	),
+	(
+		'product full-text search',
+		_search('laptop', ProductSearchMode.FULLTEXT),
+		('ix_products_search',),
+	),
+	(
+		'product autocomplete',
+		_search('lapt', ProductSearchMode.AUTOCOMPLETE),
+		('ix_products_name_trgm',),
+	),
+)
+
+
+class Explain(Executable, ClauseElement):
+	inherit_cache = False
+
+	def __init__(self, query):
+		self.query = query
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+	return 'EXPLAIN (FORMAT JSON) ' + compiler.process(element.query, **kw)
+
+
+def index_names(
+	plan: dict
+) -> Iterator[str]:
+	if 'Index Name' in plan:
+		yield plan['Index Name']
+	for child in plan.get('Plans', ()):
+		yield from index_names(child)
+
+
+async def used_indexes(
+	session,
+	query
+) -> List[str]:
+	result = await session.execute(Explain(query))
+	return list(index_names(result.scalar()[0]['Plan']))
+
+
+async def run() -> int:
+	init_db(settings.database_dsn)
+	failures = 0
+	async with create_session() as session:
+		# Small development tables are cheaper to scan, so only ask
+		# whether the planner can use the index at all.
+		await session.execute(text('SET LOCAL enable_seqscan = off'))
+		for name, query, expected in CHECKS:
+			try:
+				async with session.begin_nested():
+					indexes = await used_indexes(session, query)
+			except DBAPIError as e:
+				failures += 1
+				print('FAIL', name, '->', e.orig)
+				continue
+			ok = any(index in indexes for index in expected)
+			failures += not ok
+			print(
+				'ok  ' if ok else 'FAIL',
+				name,
+				'->',
+				', '.join(indexes) or 'no index'
+			)
+		await session.rollback()
+	return failures
+
+
+def main():
+	sys.exit(1 if asyncio.run(run()) else 0)
+
+
+if __name__ == '__main__':
+	main()
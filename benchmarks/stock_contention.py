@@ -0,0 +1,252 @@
+# Standard Library
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+
+# Third Party Library
+import httpx
+import orjson
+from sqlalchemy import (
+	func,
+	select,
+)
+
+# Application Library
+from benchmarks.harness import (
+	app_client,
+	percentile,
+)
+from fastapi_common.db import create_session
+from src.conf import settings
+from src.crud.product import product_crud
+from src.models import OrderItem
+
+
+async def seed_product(
+	client: httpx.AsyncClient,
+	stock: int,
+	shards: int
+) -> int:
+	response = await client.post(
+		'/products/',
+		json={
+			'name': f'contention-{shards}-shards',
+			'price': 1,
+			'stock_quantity': stock
+		}
+	)
+	response.raise_for_status()
+	product_id = response.json()['id']
+	if shards:
+		response = await client.patch(
+			f'/products/{product_id}/stock-shards',
+			params={'shards': shards}
+		)
+		response.raise_for_status()
+
+	return product_id
+
+
+async def buy(
+	client: httpx.AsyncClient,
+	product_id: int,
+	quantity: int
+) -> tuple:
+	start = time.perf_counter()
+	response = await client.post(
+		'/orders/',
+		json={
+			'status': 'в процессе',
+			'items': [{'product_id': product_id, 'quantity': quantity}]
+		}
+	)
+	return response.status_code, (time.perf_counter() - start) * 1000
+
+
+async def buy_many(
+	product_id: int,
+	buyers: int,
+	args: argparse.Namespace,
+	barrier
+) -> tuple:
+	async with app_client() as client:
+		# Processes start buying together once they are all imported.
+		barrier.wait()
+		start = time.time()
+		results = await asyncio.gather(*(
+			buy(client, product_id, args.quantity)
+			for _ in range(buyers)
+		))
+		return start, time.time(), results
+
+
+def buyer_process(
+	product_id: int,
+	buyers: int,
+	args: argparse.Namespace,
+	barrier,
+	queue
+) -> None:
+	configure(args)
+	queue.put(asyncio.run(buy_many(product_id, buyers, args, barrier)))
+
+
+def configure(
+	args: argparse.Namespace
+) -> None:
+	settings.db_pool_size = max(1, args.connections // args.processes)
+	settings.db_max_overflow = 0
+
+
+def buy_in_processes(
+	product_id: int,
+	args: argparse.Namespace
+) -> tuple:
+	# One event loop tops out well before the row lock does, several
+	# processes are what gunicorn workers would put on the row.
+	context = multiprocessing.get_context('spawn')
+	barrier = context.Barrier(args.processes)
+	queue = context.Queue()
+	processes = [
+		context.Process(
+			target=buyer_process,
+			args=(
+				product_id,
+				len(range(index, args.buyers, args.processes)),
+				args,
+				barrier,
+				queue
+			)
+		)
+		for index in range(args.processes)
+	]
+	for process in processes:
+		process.start()
+	outcomes = [queue.get() for _ in processes]
+	for process in processes:
+		process.join()
+
+	return (
+		max(end for _, end, _ in outcomes)
+		- min(start for start, _, _ in outcomes),
+		[result for _, _, results in outcomes for result in results]
+	)
+
+
+async def sold(
+	product_id: int
+) -> int:
+	async with create_session() as session:
+		return (await session.execute(
+			select(func.coalesce(func.sum(OrderItem.quantity), 0))
+			.where(OrderItem.product_id == product_id)
+		)).scalar()
+
+
+async def run_mode(
+	client: httpx.AsyncClient,
+	shards: int,
+	args: argparse.Namespace
+) -> dict:
+	product_id = await seed_product(client, args.stock, shards)
+
+	if args.processes > 1:
+		elapsed, results = await asyncio.get_running_loop().run_in_executor(
+			None,
+			buy_in_processes,
+			product_id,
+			args
+		)
+	else:
+		start = time.perf_counter()
+		results = await asyncio.gather(*(
+			buy(client, product_id, args.quantity)
+			for _ in range(args.buyers)
+		))
+		elapsed = time.perf_counter() - start
+
+	await product_crud.rebalance_stock(product_id)
+	stock = (await product_crud.check_stock([product_id]))[product_id]
+	sold_quantity = await sold(product_id)
+	statuses = [status for status, _ in results]
+	timings = [timing for _, timing in results]
+	accepted = statuses.count(200)
+	rejected = statuses.count(400)
+
+	return {
+		'mode': f'sharded-{shards}' if shards else 'single-row',
+		'buyers': args.buyers,
+		'accepted': accepted,
+		'rejected': rejected,
+		'failed': len(statuses) - accepted - rejected,
+		'processes': args.processes,
+		'seconds': round(elapsed, 3),
+		'orders_per_second': round(len(statuses) / elapsed, 1),
+		'p50_ms': round(percentile(timings, 0.5), 3),
+		'p95_ms': round(percentile(timings, 0.95), 3),
+		'stock_left': stock,
+		'consistent': stock >= 0 and stock + sold_quantity == args.stock,
+	}
+
+
+async def run(
+	args: argparse.Namespace
+) -> list:
+	report = []
+	async with app_client() as client:
+		for shards in [0] + args.shards:
+			result = await run_mode(client, shards, args)
+			print(orjson.dumps(result).decode(), file=sys.stderr)
+			report.append(result)
+
+	return report
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description=(
+			'Concurrent buyers of one product through POST /orders/ '
+			'against a local Postgres, with the stock in the product row '
+			'and then split over shard rows.'
+		)
+	)
+	parser.add_argument('--buyers', type=int, default=500)
+	parser.add_argument('--quantity', type=int, default=1)
+	parser.add_argument(
+		'--stock',
+		type=int,
+		default=1000,
+		help='below buyers * quantity also measures selling out'
+	)
+	parser.add_argument(
+		'--shards',
+		type=lambda value: [int(shards) for shards in value.split(',')],
+		default=[8, 32],
+		help='comma separated shard counts to compare with a single row'
+	)
+	parser.add_argument(
+		'--connections',
+		type=int,
+		default=50,
+		help='connections across all processes, shards cannot help past it'
+	)
+	parser.add_argument(
+		'--processes',
+		type=int,
+		default=1,
+		help='buyer processes, like gunicorn workers'
+	)
+	args = parser.parse_args()
+	configure(args)
+
+	report = asyncio.run(run(args))
+	sys.stdout.buffer.write(
+		orjson.dumps(report, option=orjson.OPT_INDENT_2) + b'\n'
+	)
+	sys.exit(0 if all(result['consistent'] for result in report) else 1)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,122 @@
+# Standard Library
+import argparse
+import asyncio
+import random
+import sys
+
+# Third Party Library
+import httpx
+from sqlalchemy import (
+	func,
+	select,
+)
+
+# Application Library
+from benchmarks.harness import app_client
+from fastapi_common.db import create_session
+from src.models import (
+	OrderItem,
+	Product,
+)
+
+
+async def seed_products(
+	client: httpx.AsyncClient,
+	count: int,
+	stock: int
+) -> list:
+	product_ids = []
+	for index in range(count):
+		response = await client.post(
+			'/products/',
+			json={
+				'name': f'stress-{index}',
+				'price': 1,
+				'stock_quantity': stock
+			}
+		)
+		response.raise_for_status()
+		product_ids.append(response.json()['id'])
+
+	return product_ids
+
+
+async def place_order(
+	client: httpx.AsyncClient,
+	product_ids: list,
+	items_per_order: int
+) -> int:
+	# Shuffled lines make concurrent orders touch the same rows in
+	# different orders, which is what used to deadlock.
+	items = [
+		{'product_id': product_id, 'quantity': 1}
+		for product_id in random.sample(product_ids, items_per_order)
+	]
+	response = await client.post(
+		'/orders/',
+		json={'status': 'в процессе', 'items': items}
+	)
+	return response.status_code
+
+
+async def run(
+	args: argparse.Namespace
+) -> int:
+	async with app_client() as client:
+		product_ids = await seed_products(client, args.products, args.stock)
+		statuses = await asyncio.gather(*(
+			place_order(client, product_ids, args.items)
+			for _ in range(args.orders)
+		))
+
+	async with create_session() as session:
+		stock = dict((await session.execute(
+			select(Product.id, Product.stock_quantity)
+			.where(Product.id.in_(product_ids))
+		)).all())
+		ordered = dict((await session.execute(
+			select(OrderItem.product_id, func.sum(OrderItem.quantity))
+			.where(OrderItem.product_id.in_(product_ids))
+			.group_by(OrderItem.product_id)
+		)).all())
+
+	accepted = statuses.count(200)
+	rejected = statuses.count(400)
+	failed = len(statuses) - accepted - rejected
+	print(
+		f'orders: {len(statuses)} accepted: {accepted} '
+		f'rejected: {rejected} failed: {failed}'
+	)
+
+	errors = []
+	if failed:
+		errors.append(f'{failed} orders failed with unexpected status')
+	for product_id in product_ids:
+		sold = ordered.get(product_id, 0)
+		if stock[product_id] < 0:
+			errors.append(f'product {product_id} oversold: {stock[product_id]}')
+		if stock[product_id] + sold != args.stock:
+			errors.append(
+				f'product {product_id} lost updates: '
+				f'stock {stock[product_id]} + sold {sold} != {args.stock}'
+			)
+
+	for error in errors:
+		print(error, file=sys.stderr)
+
+	return 1 if errors else 0
+
+
+def main():
+	parser = argparse.ArgumentParser(
+		description='Concurrent POST /orders/ against a local Postgres.'
+	)
+	parser.add_argument('--orders', type=int, default=500)
+	parser.add_argument('--products', type=int, default=5)
+	parser.add_argument('--items', type=int, default=3)
+	parser.add_argument('--stock', type=int, default=200)
+	sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == '__main__':
+	main()
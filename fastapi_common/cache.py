@@ -0,0 +1,159 @@
+# Standard Library
+import asyncio
+import time
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+)
+
+__all__ = (
+    'MISSING',
+    'CacheBackend',
+    'LRUCache',
+    'ReadThroughCache',
+)
+
+MISSING = object()
+
+
+class CacheBackend(ABC):
+    """Cache storage interface, async so shared backends can plug in."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> Any:
+        """Return the cached value or MISSING."""
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: Hashable) -> None:
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    async def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return MISSING
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**super().stats(), 'size': len(self._data)}
+
+
+class ReadThroughCache:
+    """
+    Loads missing keys through a loader and coalesces concurrent misses.
+
+    While a key is being loaded, other callers await the same future
+    instead of querying the database again. Invalidating a key detaches
+    the in-flight load so its possibly stale result is not stored.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.coalesced = 0
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+
+    async def get(
+            self,
+            key: Hashable,
+            loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            return value
+
+        future = self._loading.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved when nobody else waited.
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(value)
+            if value is not None and self._loading.get(key) is future:
+                await self.backend.set(key, value)
+            return value
+        finally:
+            if self._loading.get(key) is future:
+                del self._loading[key]
+
+    async def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._loading.pop(key, None)
+        await self.backend.delete(*keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.backend.stats(), 'coalesced': self.coalesced}
@@ -0,0 +1,72 @@
+# Standard Library
+import hashlib
+from typing import (
+    Iterable,
+    List,
+    Optional,
+)
+
+# Third Party Library
+from fastapi import Response
+
+__all__ = (
+    'weak_etag',
+    'digest_etag',
+    'parse_etags',
+    'etag_matches',
+    'parse_versions',
+    'not_modified',
+)
+
+
+def weak_etag(value) -> str:
+    return f'W/"{value}"'
+
+
+def digest_etag(parts: Iterable) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return weak_etag(digest.hexdigest())
+
+
+def parse_etags(header: str) -> Optional[List[str]]:
+    """Opaque tags of an If-Match/If-None-Match header, None for `*`."""
+    if header.strip() == '*':
+        return None
+    tags = []
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        tags.append(tag.strip('"'))
+    return tags
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    # Weak comparison, a weak and a strong tag with the same opaque
+    # value match.
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return tags is None or parse_etags(etag)[0] in tags
+
+
+def parse_versions(header: Optional[str]) -> Optional[List[int]]:
+    """
+    Row versions an If-Match header allows, None when any will do.
+
+    A tag is the version, optionally followed by a dot and a qualifier.
+    """
+    if not header:
+        return None
+    tags = parse_etags(header)
+    if tags is None:
+        return None
+    versions = (tag.split('.', 1)[0] for tag in tags)
+    return [int(version) for version in versions if version.isdigit()]
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag})
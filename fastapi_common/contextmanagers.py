@@ -1,10 +1,23 @@
 # Third Party Library
 from fastapi import (
     HTTPException,
+    Request,
     status,
 )
+from fastapi.exception_handlers import http_exception_handler
 from sqlalchemy.exc import IntegrityError as DBIntegrityError
 
+from .metrics import INTEGRITY_CONFLICTS
+
+
+def _conflict(exc: DBIntegrityError) -> HTTPException:
+    INTEGRITY_CONFLICTS.inc()
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        # The driver error adapted by asyncpg's dialect is the cause.
+        detail=str(exc.orig.__cause__ or exc.orig)
+    )
+
 
 class IntegrityError:
     def __init__(self, raise_exc: bool = True):
@@ -15,8 +28,14 @@ class IntegrityError:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self._raise and exc_val and isinstance(exc_val, DBIntegrityError):
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail='\n'.join(exc_val.orig.args)
-            )
+            raise _conflict(exc_val)
         return not self._raise
+
+
+async def integrity_error_handler(
+        request: Request,
+        exc: DBIntegrityError
+):
+    # Constraint violations that reach the app are the client's
+    # conflict, not a server error.
+    return await http_exception_handler(request, _conflict(exc))
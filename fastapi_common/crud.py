@@ -1,18 +1,65 @@
 # Standard Library
 from functools import reduce
-from typing import List
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
 
 # Third Party Library
-from .db import create_session
+from .db import (
+    commit_session,
+    create_session,
+)
+from .pagination import (
+    decode_cursor,
+    keyset_condition,
+)
 from sqlalchemy import (
     delete,
+    insert,
     select,
     update,
 )
+from sqlalchemy.sql.expression import Executable
 
 
 class BaseCRUD:
-    async def list(
+    # Statements for the hottest lookups, keyed by name. Each is built
+    # once with bindparam placeholders, so a call skips rebuilding the
+    # select and SQLAlchemy reuses the memoized cache key and compiled
+    # SQL. Builders are called lazily, after the mappers are configured.
+    queries: Dict[str, Callable[[], Executable]] = {}
+
+    def named_query(
+            self,
+            name: str
+    ) -> Executable:
+        statements = vars(self).setdefault('_statements', {})
+        if name not in statements:
+            statements[name] = self.queries[name]()
+        return statements[name]
+
+    async def execute_named(
+            self,
+            name: str,
+            session=None,
+            **params
+    ):
+        async with create_session(session) as session:
+            return await session.execute(self.named_query(name), params)
+
+    async def get_named(
+            self,
+            name: str,
+            session=None,
+            **params
+    ):
+        return (
+            await self.execute_named(name, session=session, **params)
+        ).scalars().first()
+
+    def build_query(
             self,
             model,
             conditions: tuple = None,
@@ -21,7 +68,8 @@ class BaseCRUD:
             limit: int = None,
             offset: int = None,
             options: tuple = None,
-            session=None
+            cursor: str = None,
+            for_update: bool = False
     ):
         query = select(model)
         if joins:
@@ -32,6 +80,10 @@ class BaseCRUD:
                 conditions,
                 query
             )
+        if cursor:
+            query = query.where(
+                keyset_condition(order_by, decode_cursor(cursor, order_by))
+            )
         if order_by:
             query = query.order_by(*order_by)
         if limit:
@@ -40,9 +92,50 @@ class BaseCRUD:
             query = query.offset(offset)
         if options:
             query = query.options(*options)
+        if for_update:
+            query = query.with_for_update(of=model)
+        return query
+
+    async def list(
+            self,
+            model,
+            conditions: tuple = None,
+            joins: List[tuple] = None,
+            order_by: tuple = None,
+            limit: int = None,
+            offset: int = None,
+            options: tuple = None,
+            cursor: str = None,
+            for_update: bool = False,
+            session=None
+    ):
+        query = self.build_query(
+            model=model,
+            conditions=conditions,
+            joins=joins,
+            order_by=order_by,
+            limit=limit,
+            offset=offset,
+            options=options,
+            cursor=cursor,
+            for_update=for_update
+        )
         async with create_session(session) as session:
             return (await session.execute(query)).scalars().unique()
 
+    async def stream(
+            self,
+            query,
+            chunk_size: int = 1000,
+            session=None
+    ):
+        async with create_session(session) as session:
+            result = await session.stream(
+                query.execution_options(yield_per=chunk_size)
+            )
+            async for partition in result.mappings().partitions(chunk_size):
+                yield partition
+
     async def get(
             self,
             model,
@@ -51,6 +144,7 @@ class BaseCRUD:
             order_by: tuple = None,
             offset: int = None,
             options: tuple = None,
+            for_update: bool = False,
             session=None
     ):
         return (
@@ -61,6 +155,7 @@ class BaseCRUD:
                 order_by=order_by,
                 offset=offset,
                 options=options,
+                for_update=for_update,
                 session=session
             )
         ).first()
@@ -69,31 +164,58 @@ class BaseCRUD:
             self,
             model,
             session=None,
-            commit=True,
+            commit=None,
             **kwargs
     ):
+        if commit is None:
+            commit = session is None
         async with create_session(session) as session:
             obj = model(**kwargs)
             session.add(obj)
             await session.flush()
             await session.refresh(obj)
             if commit:
-                await session.commit()
+                await commit_session(session)
             return obj
 
+    async def create_many(
+            self,
+            model,
+            values: List[dict],
+            session=None,
+            commit=None
+    ):
+        if commit is None:
+            commit = session is None
+        async with create_session(session) as session:
+            query = insert(model).values(values).returning(
+                *model.__table__.columns
+            )
+            result = await session.execute(query)
+            fields = result.keys()
+            result = [model(**dict(zip(fields, obj))) for obj in result]
+            if commit:
+                await commit_session(session)
+            return result
+
     async def update(
             self,
             model,
             condition,
             session=None,
-            commit=True,
+            commit=None,
             many=False,
+            synchronize_session='evaluate',
             **kwargs
     ):
+        if commit is None:
+            commit = session is None
         async with create_session(session) as session:
             query = update(model).where(condition).returning(
                 *model.__table__.columns
-            ).values(**kwargs)
+            ).values(**kwargs).execution_options(
+                synchronize_session=synchronize_session
+            )
             result = await session.execute(query)
             fields = result.keys()
             if many:
@@ -102,7 +224,7 @@ class BaseCRUD:
                 obj = result.first()
                 result = model(**dict(zip(fields, obj))) if obj else None
             if commit:
-                await session.commit()
+                await commit_session(session)
             return result
 
     async def delete(
@@ -110,9 +232,11 @@ class BaseCRUD:
             model,
             condition,
             session=None,
-            commit=True
+            commit=None
     ):
+        if commit is None:
+            commit = session is None
         async with create_session(session) as session:
             await session.execute(delete(model).where(condition))
             if commit:
-                await session.commit()
+                await commit_session(session)
@@ -1,6 +1,11 @@
 # Standard Library
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+)
 
 # Third Party Library
 from pydantic import PostgresDsn
@@ -10,32 +15,81 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from .pool import TimedAsyncAdaptedQueuePool
 
 __all__ = (
     'create_session',
     'init_db',
     'create_engine',
+    'get_pool_status',
+    'get_session',
+    'transaction',
+    'commit_session',
+    'after_commit',
+    'MAX_BIND_PARAMS',
 )
 
+_AFTER_COMMIT = 'after_commit'
+
+# asyncpg sends parameter counts as int16, a statement binds at most this.
+MAX_BIND_PARAMS = 32767
+
 _engine: Optional[AsyncEngine] = None
 _Session: Optional[sessionmaker] = None
 
 
-def create_engine(database_dsn: PostgresDsn) -> AsyncEngine:
+def create_engine(
+        database_dsn: PostgresDsn,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        prepared_statement_cache_size: int = 100,
+        server_settings: Optional[Dict[str, str]] = None,
+        pgbouncer: bool = False
+) -> AsyncEngine:
     global _engine
 
     if not _engine:
+        connect_args = {
+            'statement_cache_size': statement_cache_size,
+            'prepared_statement_cache_size': prepared_statement_cache_size,
+            'server_settings': server_settings or {},
+        }
+        if pgbouncer:
+            # pgbouncer in transaction mode cannot keep prepared
+            # statements or server-side connection state.
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+            )
+            pool_options = {'poolclass': NullPool}
+        else:
+            pool_options = {
+                'poolclass': TimedAsyncAdaptedQueuePool,
+                'pool_size': pool_size,
+                'max_overflow': max_overflow,
+                'pool_timeout': pool_timeout,
+                'pool_recycle': pool_recycle,
+            }
+
         _engine = create_async_engine(
             database_dsn,
-            pool_pre_ping=True
+            pool_pre_ping=pool_pre_ping,
+            connect_args=connect_args,
+            **pool_options
         )
 
     return _engine
 
 
-def init_db(database_dsn: PostgresDsn):
+def init_db(database_dsn: PostgresDsn, **engine_options):
     global _Session
-    create_engine(database_dsn)
+    create_engine(database_dsn, **engine_options)
 
     if not _Session:
         _Session = sessionmaker(
@@ -45,6 +99,25 @@ def init_db(database_dsn: PostgresDsn):
         )
 
 
+def get_pool_status() -> dict:
+    if not _engine:
+        return {}
+
+    pool = _engine.sync_engine.pool
+    if not isinstance(pool, TimedAsyncAdaptedQueuePool):
+        return {'pool': pool.status()}
+
+    status = {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+    }
+    if pool.checkout_stats:
+        status.update(pool.checkout_stats.as_dict())
+    return status
+
+
 @asynccontextmanager
 async def create_session(session=None, **kwargs):
     if session:
@@ -52,3 +125,40 @@ async def create_session(session=None, **kwargs):
     else:
         async with _Session(**kwargs) as session:
             yield session
+
+
+async def get_session():
+    """
+    FastAPI dependency with one session per request.
+
+    Handlers commit explicitly with commit_session before returning,
+    anything left uncommitted is rolled back when the session closes.
+    """
+    async with _Session() as session:
+        yield session
+
+
+def after_commit(session, callback: Callable[[], Awaitable]) -> None:
+    session.info.setdefault(_AFTER_COMMIT, []).append(callback)
+
+
+async def commit_session(session) -> None:
+    await session.commit()
+    for callback in session.info.pop(_AFTER_COMMIT, []):
+        await callback()
+
+
+@asynccontextmanager
+async def transaction(session=None):
+    if session:
+        # The owner of the session commits the unit of work.
+        yield session
+    else:
+        async with _Session() as session:
+            try:
+                yield session
+            except BaseException:
+                session.info.pop(_AFTER_COMMIT, None)
+                await session.rollback()
+                raise
+            await commit_session(session)
@@ -0,0 +1,73 @@
+# Standard Library
+import time
+
+# Third Party Library
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from ..instrumentation import record_pool_wait
+
+__all__ = (
+    'CheckoutStats',
+    'TimedAsyncAdaptedQueuePool',
+)
+
+
+class CheckoutStats:
+    def __init__(
+        self
+    ):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(
+        self,
+        wait: float,
+        timed_out: bool = False,
+        failed: bool = False
+    ) -> None:
+        self.checkouts += 1
+        self.timeouts += timed_out
+        self.errors += failed
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def as_dict(
+        self
+    ) -> dict:
+        return {
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'wait_total': self.wait_total,
+            'wait_max': self.wait_max,
+        }
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    checkout_stats = None
+
+    def _do_get(
+        self
+    ):
+        if self.checkout_stats is None:
+            self.checkout_stats = CheckoutStats()
+
+        start = time.perf_counter()
+        timed_out = failed = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        except Exception:
+            # A refused or broken connect, not a wait for a free slot.
+            failed = True
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.checkout_stats.record(wait, timed_out=timed_out, failed=failed)
+            record_pool_wait(wait)
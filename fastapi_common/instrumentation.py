@@ -0,0 +1,155 @@
+# Standard Library
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import (
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+)
+
+# Third Party Library
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+__all__ = (
+    'RequestStats',
+    'current_stats',
+    'instrument_engine',
+    'record_pool_wait',
+    'TimedORJSONResponse',
+    'RequestTimingMiddleware',
+)
+
+
+class RequestStats:
+    def __init__(self, track_statements: bool = False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.serialization = 0.0
+        self.slow_statements: List[Tuple[str, float]] = []
+        self.statements: Optional[Counter] = (
+            Counter() if track_statements else None
+        )
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        if self.statements is None:
+            return []
+        return [
+            (statement, count)
+            for statement, count in self.statements.items()
+            if count >= threshold
+        ]
+
+    def server_timing(self, total: float) -> str:
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'pool;dur={self.pool_wait * 1000:.2f}',
+            f'serialize;dur={self.serialization * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+
+
+_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    'request_stats',
+    default=None
+)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _stats.get()
+
+
+def record_pool_wait(wait: float) -> None:
+    stats = _stats.get()
+    if stats is not None:
+        stats.pool_wait += wait
+
+
+def instrument_engine(
+        engine: Engine,
+        slow_statement_ms: Optional[float] = None
+) -> None:
+    slow_statement = (
+        slow_statement_ms / 1000 if slow_statement_ms is not None else None
+    )
+
+    # SQLAlchemy runs these inside the calling task's context, so the
+    # request's RequestStats is visible here.
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+    ):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(
+            conn, cursor, statement, parameters, context, executemany
+    ):
+        stats = _stats.get()
+        if stats is None:
+            return
+        duration = time.perf_counter() - context._query_started_at
+        stats.queries += 1
+        stats.db_time += duration
+        if stats.statements is not None:
+            stats.statements[statement] += 1
+        if slow_statement is not None and duration >= slow_statement:
+            stats.slow_statements.append((statement, duration))
+
+
+class TimedORJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        start = time.perf_counter()
+        body = super().render(content)
+        stats = _stats.get()
+        if stats is not None:
+            stats.serialization += time.perf_counter() - start
+        return body
+
+
+class RequestTimingMiddleware:
+    def __init__(
+            self,
+            app,
+            on_finish: Callable[[dict, int, RequestStats, float], Awaitable],
+            track_statements: bool = False
+    ):
+        self.app = app
+        self.on_finish = on_finish
+        self.track_statements = track_statements
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(track_statements=self.track_statements)
+        token = _stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                message.setdefault('headers', [])
+                message['headers'] = list(message['headers']) + [(
+                    b'server-timing',
+                    stats.server_timing(time.perf_counter() - start).encode()
+                )]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _stats.reset(token)
+            await self.on_finish(
+                scope,
+                status_code,
+                stats,
+                time.perf_counter() - start
+            )
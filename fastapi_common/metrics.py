@@ -0,0 +1,212 @@
+# Standard Library
+import os
+import time
+
+# Third Party Library
+from fastapi.responses import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from .db import get_pool_status
+
+__all__ = (
+    'REQUEST_LATENCY',
+    'REQUESTS_IN_FLIGHT',
+    'INTEGRITY_CONFLICTS',
+    'MetricsMiddleware',
+    'metrics_response',
+    'register_cache',
+)
+
+# Gauges use livesum so that with PROMETHEUS_MULTIPROC_DIR set the values
+# of all live gunicorn workers are added up and dead workers drop out.
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route',
+    ('method', 'route', 'status'),
+    buckets=(
+        .005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10
+    )
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight',
+    'HTTP requests currently being served',
+    multiprocess_mode='livesum'
+)
+INTEGRITY_CONFLICTS = Counter(
+    'db_integrity_conflicts_total',
+    'Integrity errors returned to clients as 409 Conflict'
+)
+POOL_SIZE = Gauge(
+    'db_pool_size',
+    'Connections held by the pool',
+    multiprocess_mode='livesum'
+)
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out',
+    'Connections checked out of the pool',
+    multiprocess_mode='livesum'
+)
+POOL_OVERFLOW = Gauge(
+    'db_pool_overflow',
+    'Connections opened beyond pool_size',
+    multiprocess_mode='livesum'
+)
+
+# Mirrors of per-process running totals, so gauges set from them rather
+# than counters incremented on every checkout or cache lookup.
+POOL_CHECKOUT_STATS = {
+    'checkouts': Gauge(
+        'db_pool_checkouts',
+        'Connection checkouts attempted',
+        multiprocess_mode='livesum'
+    ),
+    'timeouts': Gauge(
+        'db_pool_checkout_timeouts',
+        'Checkouts that timed out waiting for a free connection',
+        multiprocess_mode='livesum'
+    ),
+    'errors': Gauge(
+        'db_pool_checkout_errors',
+        'Checkouts that failed to open a connection',
+        multiprocess_mode='livesum'
+    ),
+    'wait_total': Gauge(
+        'db_pool_checkout_wait_seconds',
+        'Total time spent waiting for a connection',
+        multiprocess_mode='livesum'
+    ),
+    'wait_max': Gauge(
+        'db_pool_checkout_wait_max_seconds',
+        'Longest wait for a connection',
+        multiprocess_mode='livemax'
+    ),
+}
+CACHE_STATS = {
+    'hits': Gauge(
+        'cache_hits',
+        'Cache lookups served from the cache',
+        ('cache',),
+        multiprocess_mode='livesum'
+    ),
+    'misses': Gauge(
+        'cache_misses',
+        'Cache lookups that missed',
+        ('cache',),
+        multiprocess_mode='livesum'
+    ),
+    'evictions': Gauge(
+        'cache_evictions',
+        'Entries evicted to stay within the cache size',
+        ('cache',),
+        multiprocess_mode='livesum'
+    ),
+    'size': Gauge(
+        'cache_size',
+        'Entries currently cached',
+        ('cache',),
+        multiprocess_mode='livesum'
+    ),
+    'coalesced': Gauge(
+        'cache_coalesced',
+        'Misses that awaited a load already in flight',
+        ('cache',),
+        multiprocess_mode='livesum'
+    ),
+}
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+_caches = {}
+
+
+def register_cache(name: str, cache) -> None:
+    """Exports ``cache.stats()`` under the ``cache`` label ``name``."""
+    _caches[name] = cache
+
+
+def _update_gauges() -> None:
+    for name, cache in _caches.items():
+        for key, value in cache.stats().items():
+            if key in CACHE_STATS:
+                CACHE_STATS[key].labels(name).set(value)
+
+    status = get_pool_status()
+    if 'size' not in status:
+        return
+    POOL_SIZE.set(status['size'])
+    POOL_CHECKED_OUT.set(status['checked_out'])
+    POOL_OVERFLOW.set(max(status['overflow'], 0))
+    for key, gauge in POOL_CHECKOUT_STATS.items():
+        if key in status:
+            gauge.set(status[key])
+
+
+def metrics_response() -> Response:
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        _update_gauges()
+        registry = REGISTRY
+    return Response(
+        content=generate_latest(registry),
+        headers={'Content-Type': CONTENT_TYPE_LATEST}
+    )
+
+
+class MetricsMiddleware:
+    """
+    Records latency per route template rather than per raw path, so
+    /products/1 and /products/2 share one series and unmatched paths
+    cannot blow up label cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._routes is None:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope['app'].routes
+                if hasattr(route, 'endpoint')
+            }
+        return self._routes.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.labels(
+                scope['method'],
+                self._route_label(scope),
+                str(status_code)
+            ).observe(time.perf_counter() - start)
+            REQUESTS_IN_FLIGHT.dec()
+            _update_gauges()
@@ -0,0 +1,142 @@
+# Standard Library
+from base64 import (
+    urlsafe_b64decode,
+    urlsafe_b64encode,
+)
+from datetime import (
+    date,
+    datetime,
+)
+from typing import (
+    Any,
+    Sequence,
+    Tuple,
+)
+
+# Third Party Library
+import orjson
+from sqlalchemy import (
+    and_,
+    false,
+    or_,
+    tuple_,
+)
+from sqlalchemy.sql import operators
+
+__all__ = (
+    'InvalidCursorError',
+    'encode_cursor',
+    'decode_cursor',
+    'cursor_for',
+    'keyset_condition',
+)
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _unwrap(expression) -> Tuple[Any, bool]:
+    descending = False
+    modifier = getattr(expression, 'modifier', None)
+    if modifier in (operators.desc_op, operators.asc_op):
+        expression, descending = (
+            expression.element,
+            modifier is operators.desc_op
+        )
+    return expression.expression, descending
+
+
+def _key(expression) -> str:
+    column, _ = _unwrap(expression)
+    return column.key
+
+
+def _coerce(value, column):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(order_by: Sequence, values: Sequence) -> str:
+    payload = orjson.dumps({
+        'k': [_key(expression) for expression in order_by],
+        'v': list(values),
+    })
+    return urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(token: str, order_by: Sequence) -> tuple:
+    try:
+        payload = orjson.loads(
+            urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        )
+        keys, values = payload['k'], payload['v']
+    except (ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError('Malformed cursor') from exc
+
+    if keys != [_key(expression) for expression in order_by]:
+        raise InvalidCursorError('Cursor does not match the sort order')
+
+    try:
+        return tuple(
+            _coerce(value, _unwrap(expression)[0])
+            for expression, value in zip(order_by, values)
+        )
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError('Malformed cursor') from exc
+
+
+def cursor_for(obj, order_by: Sequence) -> str:
+    return encode_cursor(
+        order_by,
+        [getattr(obj, _key(expression)) for expression in order_by]
+    )
+
+
+def _after(column, value, descending: bool):
+    # Postgres sorts NULLs last for ASC and first for DESC.
+    nullable = getattr(column, 'nullable', True)
+    if value is None:
+        return column.isnot(None) if descending else false()
+    if descending:
+        return column < value
+    if nullable:
+        return or_(column > value, column.is_(None))
+    return column > value
+
+
+def _equals(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def keyset_condition(order_by: Sequence, values: Sequence):
+    columns = [_unwrap(expression) for expression in order_by]
+
+    if all(
+        not descending
+        and not getattr(column, 'nullable', True)
+        and value is not None
+        for (column, descending), value in zip(columns, values)
+    ):
+        # A row comparison is answered by a single composite index scan.
+        return tuple_(*(column for column, _ in columns)) > tuple_(*values)
+
+    clauses = []
+    for index, (column, descending) in enumerate(columns):
+        clauses.append(and_(
+            *(
+                _equals(previous, value)
+                for (previous, _), value in zip(columns[:index], values)
+            ),
+            _after(column, values[index], descending)
+        ))
+    return or_(*clauses)
@@ -0,0 +1,168 @@
+# Standard Library
+import codecs
+import csv
+import io
+from datetime import date
+from enum import Enum
+from typing import (
+    AsyncIterator,
+    Dict,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+# Third Party Library
+import orjson
+
+__all__ = (
+    'iter_lines',
+    'iter_ndjson',
+    'iter_csv',
+    'batched',
+    'ndjson_chunks',
+    'csv_chunks',
+)
+
+T = TypeVar('T')
+
+Row = Tuple[int, Union[Dict, ValueError]]
+
+
+async def iter_lines(
+        chunks: AsyncIterator[bytes],
+        encoding: str = 'utf-8',
+        max_line_length: int = None
+) -> AsyncIterator[Union[str, ValueError]]:
+    # A line over max_line_length is yielded as a ValueError and the rest
+    # of it skipped, so the buffer never holds more than one such line.
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    too_long = ValueError(f'Line longer than {max_line_length} characters')
+    buffer = ''
+    skipping = False
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if skipping:
+                skipping = False
+            elif max_line_length and len(line) > max_line_length:
+                yield too_long
+            else:
+                yield line.rstrip('\r')
+        if max_line_length and len(buffer) > max_line_length:
+            if not skipping:
+                yield too_long
+            skipping = True
+            buffer = ''
+    buffer += decoder.decode(b'', final=True)
+    if skipping:
+        return
+    if max_line_length and len(buffer) > max_line_length:
+        yield too_long
+    elif buffer:
+        yield buffer.rstrip('\r')
+
+
+async def iter_ndjson(
+        lines: AsyncIterator[Union[str, ValueError]]
+) -> AsyncIterator[Row]:
+    number = 0
+    async for line in lines:
+        number += 1
+        if isinstance(line, ValueError):
+            yield number, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            value = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield number, ValueError(f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(value, dict):
+            yield number, ValueError('Expected a JSON object')
+            continue
+        yield number, value
+
+
+async def iter_csv(
+        lines: AsyncIterator[Union[str, ValueError]]
+) -> AsyncIterator[Row]:
+    # Rows are parsed line by line, quoted fields spanning several
+    # lines are not supported.
+    header = None
+    number = 0
+    async for line in lines:
+        number += 1
+        if isinstance(line, ValueError):
+            yield number, line
+            continue
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield number, ValueError(
+                f'Expected {len(header)} columns, got {len(values)}'
+            )
+            continue
+        yield number, {
+            name: value
+            for name, value in zip(header, values)
+            if value != ''
+        }
+
+
+async def batched(
+        items: AsyncIterator[T],
+        size: int
+) -> AsyncIterator[List[T]]:
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ndjson_chunks(
+        batches: AsyncIterator[List[Dict]]
+) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b''.join(orjson.dumps(row) + b'\n' for row in batch)
+
+
+def _csv_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    if value is None:
+        return ''
+    return value
+
+
+async def csv_chunks(
+        batches: AsyncIterator[List[Dict]],
+        fields: Sequence[str]
+) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for batch in batches:
+        writer.writerows(
+            [_csv_value(row[field]) for field in fields]
+            for row in batch
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,20 @@
+# Standard Library
+import os
+import shutil
+
+# Third Party Library
+from prometheus_client import multiprocess
+
+worker_class = 'uvicorn.workers.UvicornWorker'
+
+
+def on_starting(server):
+	path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+	if path:
+		shutil.rmtree(path, ignore_errors=True)
+		os.makedirs(path)
+
+
+def child_exit(server, worker):
+	if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+		multiprocess.mark_process_dead(worker.pid)
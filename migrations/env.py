@@ -25,6 +25,9 @@ fileConfig(config.config_file_name)
 # add your model's MetaData object here
 # for 'autogenerate' support
 from src.models.products import *
+from src.models.analytics import *
+from src.models.idempotency import *
+from src.models.outbox import *
 
 # target_metadata = mymodel.Base.metadata
 target_metadata = BaseModel.metadata
@@ -0,0 +1,51 @@
+"""order items unique product
+
+Revision ID: 2f6a8d4e1c93
+Revises: 9b1f3c2d7e41
+Create Date: 2026-10-17 11:03:27.540112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6a8d4e1c93'
+down_revision = '9b1f3c2d7e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fold duplicate lines into the oldest one so the reserved stock
+    # they account for is kept.
+    op.execute("""
+        UPDATE order_items
+        SET quantity = merged.quantity
+        FROM (
+            SELECT min(id) AS id, sum(quantity) AS quantity
+            FROM order_items
+            GROUP BY order_id, product_id
+            HAVING count(*) > 1
+        ) AS merged
+        WHERE order_items.id = merged.id
+    """)
+    op.execute("""
+        DELETE FROM order_items
+        USING order_items AS kept
+        WHERE order_items.order_id = kept.order_id
+        AND order_items.product_id = kept.product_id
+        AND order_items.id > kept.id
+    """)
+    # Build the index without blocking writes, then attach it as the
+    # constraint, which only takes a brief lock.
+    with op.get_context().autocommit_block():
+        op.create_index('uq_order_items_order_id_product_id', 'order_items', ['order_id', 'product_id'], unique=True, postgresql_concurrently=True)
+        op.execute(
+            'ALTER TABLE order_items ADD CONSTRAINT uq_order_items_order_id_product_id '
+            'UNIQUE USING INDEX uq_order_items_order_id_product_id'
+        )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_order_items_order_id_product_id', 'order_items', type_='unique')
@@ -0,0 +1,28 @@
+"""order status indexes
+
+Revision ID: 5e8b1a7f3d20
+Revises: c7d2e9a4b815
+Create Date: 2026-10-17 13:41:08.193526
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b1a7f3d20'
+down_revision = 'c7d2e9a4b815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_status_created_at_id', 'orders', ['status', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_orders_in_progress_created_at_id', 'orders', ['created_at', 'id'], unique=False, postgresql_where=sa.text("status = 'IN_PROGRESS'"), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_in_progress_created_at_id', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_status_created_at_id', table_name='orders', postgresql_concurrently=True)
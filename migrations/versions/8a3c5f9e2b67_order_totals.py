@@ -0,0 +1,51 @@
+"""order totals
+
+Revision ID: 8a3c5f9e2b67
+Revises: 5e8b1a7f3d20
+Create Date: 2026-10-17 14:52:36.604418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a3c5f9e2b67'
+down_revision = '5e8b1a7f3d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('total_amount', sa.Float(), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('order_items', sa.Column('unit_price', sa.Float(), nullable=True))
+    # No price history exists, the current price is the best snapshot.
+    op.execute("""
+        UPDATE order_items
+        SET unit_price = products.price
+        FROM products
+        WHERE products.id = order_items.product_id
+    """)
+    op.alter_column('order_items', 'unit_price',
+               existing_type=sa.Float(),
+               nullable=False)
+    op.execute("""
+        UPDATE orders
+        SET total_amount = totals.total_amount,
+            item_count = totals.item_count
+        FROM (
+            SELECT order_id,
+                   round(sum(unit_price * quantity)::numeric, 2) AS total_amount,
+                   sum(quantity) AS item_count
+            FROM order_items
+            GROUP BY order_id
+        ) AS totals
+        WHERE orders.id = totals.order_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('order_items', 'unit_price')
+    op.drop_column('orders', 'item_count')
+    op.drop_column('orders', 'total_amount')
@@ -0,0 +1,62 @@
+"""keyset pagination indexes
+
+Revision ID: 9b1f3c2d7e41
+Revises: 4cec1319b259
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1f3c2d7e41'
+down_revision = '4cec1319b259'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, and nothing below may
+    # hold a lock on orders or products for longer than a moment.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_name_id', 'products', ['name', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+
+        # created_at always had a default, so only rows written around
+        # it are backfilled, a batch per commit.
+        op.execute("""
+            DO $$
+            BEGIN
+                LOOP
+                    UPDATE orders SET created_at = timezone('utc', now())
+                    WHERE id IN (
+                        SELECT id FROM orders
+                        WHERE created_at IS NULL
+                        LIMIT 10000
+                    );
+                    EXIT WHEN NOT FOUND;
+                    COMMIT;
+                END LOOP;
+            END $$
+        """)
+        # VALIDATE scans under a lock that lets writes through, SET NOT
+        # NULL then relies on the validated check instead of a scan.
+        op.execute(
+            'ALTER TABLE orders ADD CONSTRAINT ck_orders_created_at_not_null '
+            'CHECK (created_at IS NOT NULL) NOT VALID'
+        )
+        op.execute('ALTER TABLE orders VALIDATE CONSTRAINT ck_orders_created_at_not_null')
+        op.alter_column('orders', 'created_at',
+                   existing_type=sa.DateTime(),
+                   nullable=False)
+        op.drop_constraint('ck_orders_created_at_not_null', 'orders', type_='check')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_created_at_id', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_products_name_id', table_name='products', postgresql_concurrently=True)
+    op.alter_column('orders', 'created_at',
+               existing_type=sa.DateTime(),
+               nullable=True)
@@ -0,0 +1,28 @@
+"""row versions
+
+Revision ID: b8d1f6a3e274
+Revises: a6e2c8f4d913
+Create Date: 2026-10-17 21:26:04.731152
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d1f6a3e274'
+down_revision = 'a6e2c8f4d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A constant default is stored in the catalog, the tables are not
+    # rewritten.
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('products', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('products', 'version')
+    op.drop_column('orders', 'version')
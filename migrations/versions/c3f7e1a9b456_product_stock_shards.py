@@ -0,0 +1,39 @@
+"""product stock shards
+
+Revision ID: c3f7e1a9b456
+Revises: b8d1f6a3e274
+Create Date: 2026-10-17 22:40:18.265903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7e1a9b456'
+down_revision = 'b8d1f6a3e274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('product_stock_shards',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id', 'shard')
+    )
+    op.add_column('products', sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    # Fold sharded stock back into the product rows first.
+    op.execute(
+        'UPDATE products SET stock_quantity = shards.quantity '
+        'FROM (SELECT product_id, sum(quantity) AS quantity '
+        'FROM product_stock_shards GROUP BY product_id) AS shards '
+        'WHERE products.id = shards.product_id'
+    )
+    op.drop_column('products', 'stock_shards')
+    op.drop_table('product_stock_shards')
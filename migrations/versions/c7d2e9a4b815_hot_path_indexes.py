@@ -0,0 +1,37 @@
+"""hot path indexes
+
+Revision ID: c7d2e9a4b815
+Revises: 2f6a8d4e1c93
+Create Date: 2026-10-17 12:20:54.872310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e9a4b815'
+down_revision = '2f6a8d4e1c93'
+branch_labels = None
+depends_on = None
+
+# Lookups by order_id use the leading column of
+# uq_order_items_order_id_product_id, so it needs no index of its own.
+# The ix_*_id indexes duplicate the primary keys.
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_order_items_product_id', 'order_items', ['product_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_order_items_id', table_name='order_items', postgresql_concurrently=True)
+        op.drop_index('ix_products_id', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_orders_id', table_name='orders', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_id', 'orders', ['id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_products_id', 'products', ['id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_order_items_id', 'order_items', ['id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_order_items_product_id', table_name='order_items', postgresql_concurrently=True)
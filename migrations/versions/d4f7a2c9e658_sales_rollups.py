@@ -0,0 +1,51 @@
+"""sales rollups
+
+Revision ID: d4f7a2c9e658
+Revises: 8a3c5f9e2b67
+Create Date: 2026-10-17 16:08:19.275031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f7a2c9e658'
+down_revision = '8a3c5f9e2b67'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('item_count', sa.BigInteger(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('product_daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.BigInteger(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    rollup_watermarks = op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_order_id', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Existing orders are rolled up by the first refresh.
+    op.execute(rollup_watermarks.insert().values(
+        name='sales',
+        last_order_id=0,
+        refreshed_at=sa.func.now()
+    ))
+
+
+def downgrade() -> None:
+    op.drop_table('rollup_watermarks')
+    op.drop_table('product_daily_sales')
+    op.drop_table('daily_sales')
@@ -0,0 +1,36 @@
+"""product search indexes
+
+Revision ID: e1b6c3d8f402
+Revises: d4f7a2c9e658
+Create Date: 2026-10-17 17:45:12.906731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b6c3d8f402'
+down_revision = 'd4f7a2c9e658'
+branch_labels = None
+depends_on = None
+
+# Must stay identical to product_search_vector in src/models/products.py,
+# otherwise search queries do not match the index.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple'::regconfig, name), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.create_index('ix_products_search', 'products', [sa.text(SEARCH_VECTOR)], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_products_name_trgm', 'products', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_name_trgm', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_search', table_name='products', postgresql_concurrently=True)
@@ -1,9 +1,13 @@
 # Third Party Library
 from fastapi import APIRouter
 
+from .analytics.reports import router as analytics_router
 from .product.crud import router as crud_router
 
 router = APIRouter()
 router.include_router(
 	router=crud_router,
 )
+router.include_router(
+	router=analytics_router,
+)
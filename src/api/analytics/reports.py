@@ -0,0 +1,97 @@
+# Standard Library
+from datetime import date
+from typing import (
+	Optional,
+	Sequence,
+)
+
+# Third Party Library
+from fastapi import (
+	APIRouter,
+	Depends,
+	Query,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Application Library
+from fastapi_common.db import get_session
+from fastapi_common.instrumentation import TimedORJSONResponse
+from src.crud.analytics import analytics_crud
+from src.schemas.analytics.reports import TopProductsMetric
+
+
+def columnar(
+	rows: Sequence,
+	columns: Sequence[str]
+) -> TimedORJSONResponse:
+	# One array per column instead of one object per row, clients load
+	# it straight into dataframes and the keys are not repeated.
+	values = list(zip(*rows)) if rows else [()] * len(columns)
+	return TimedORJSONResponse(
+		content={
+			column: list(column_values)
+			for column, column_values in zip(columns, values)
+		}
+	)
+
+
+router = APIRouter(prefix='/analytics')
+
+
+@router.get(path='/revenue')
+async def revenue_per_day(
+	date_from: Optional[date] = Query(None),
+	date_to: Optional[date] = Query(None),
+	session: AsyncSession = Depends(get_session)
+) -> TimedORJSONResponse:
+	rows = await analytics_crud.revenue_per_day(
+		date_from=date_from,
+		date_to=date_to,
+		session=session
+	)
+
+	return columnar(rows, ('day', 'order_count', 'item_count', 'revenue'))
+
+
+@router.get(path='/top-products')
+async def top_products(
+	metric: TopProductsMetric = Query(TopProductsMetric.REVENUE),
+	limit: int = Query(default=10, ge=1, le=100),
+	date_from: Optional[date] = Query(None),
+	date_to: Optional[date] = Query(None),
+	session: AsyncSession = Depends(get_session)
+) -> TimedORJSONResponse:
+	rows = await analytics_crud.top_products(
+		metric=metric.value,
+		limit=limit,
+		date_from=date_from,
+		date_to=date_to,
+		session=session
+	)
+
+	return columnar(rows, ('product_id', 'name', 'quantity', 'revenue'))
+
+
+@router.get(path='/stock-velocity')
+async def stock_velocity(
+	days: int = Query(default=30, ge=1, le=365),
+	limit: int = Query(default=50, ge=1, le=500),
+	session: AsyncSession = Depends(get_session)
+) -> TimedORJSONResponse:
+	rows = await analytics_crud.stock_velocity(
+		days=days,
+		limit=limit,
+		session=session
+	)
+
+	return columnar(
+		rows,
+		(
+			'product_id',
+			'name',
+			'stock_quantity',
+			'units_sold',
+			'units_per_day',
+			'days_of_stock',
+		)
+	)
@@ -1,35 +1,86 @@
 # Standard Library
+import hashlib
+from datetime import datetime
 from typing import (
 	Any,
-	List
+	Dict,
+	List,
+	Optional,
+	Sequence
 )
 
 # Third Party Library
 from fastapi import (
 	APIRouter,
+	Depends,
+	Header,
 	HTTPException,
-	Query
+	Query,
+	Request,
+	Response
 )
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Application Library
+from fastapi_common.conditional import (
+	digest_etag,
+	etag_matches,
+	not_modified,
+	parse_versions,
+	weak_etag,
+)
+from fastapi_common.db import (
+	commit_session,
+	get_session,
+)
+from fastapi_common.instrumentation import TimedORJSONResponse
+from fastapi_common.pagination import (
+	InvalidCursorError,
+	cursor_for,
+)
+from fastapi_common.streaming import (
+	csv_chunks,
+	iter_csv,
+	iter_lines,
+	iter_ndjson,
+	ndjson_chunks,
+)
+from src.conf import settings
+from src.crud.idempotency import idempotency_crud
 from src.crud.product import (
+	PREVIOUS_STATUS,
 	product_crud,
+	product_stock,
 	order_crud,
 )
-from src.errors import InsufficientStockError
+from src.errors import (
+	InsufficientStockError,
+	VersionConflictError,
+)
 from src.models.products import (
 	Product,
 	Order,
 	OrderStatus
 )
 from src.schemas.product.crud import (
+	ExportFormat,
 	ProductCreate,
 	ProductUpdate,
 	ProductResponse,
+	ProductImportResponse,
+	ProductSearchMode,
+	ProductSearchResult,
+	OrderBatchGet,
 	OrderCreate,
 	OrderUpdate,
 	OrderResponse,
+	OrderStatusBulkResponse,
+	OrderStatusBulkUpdate,
+	OrderStatusRejection,
 )
+from src.use_cases.product.bulk_import import import_products
 
 
 def check_not_empty(
@@ -44,38 +95,168 @@ def check_not_empty(
 	return result
 
 
+def json_array(
+	documents
+) -> bytes:
+	return b'[' + ','.join(documents).encode() + b']'
+
+
+def batch_ids(
+	ids: List[int]
+) -> List[int]:
+	if len(ids) > settings.batch_get_max_ids:
+		raise HTTPException(
+			status_code=400,
+			detail=f'At most {settings.batch_get_max_ids} ids per request'
+		)
+	# Duplicates are looked up once, the first position wins.
+	return list(dict.fromkeys(ids))
+
+
+def json_by_id(
+	ids: List[int],
+	documents: Dict[int, str]
+) -> bytes:
+	# Request order, with null for ids that were not found.
+	return b'{' + ','.join(
+		f'"{id_}":{documents.get(id_, "null")}' for id_ in ids
+	).encode() + b'}'
+
+
+def product_etag(
+	product
+) -> str:
+	# Shard writes leave the row version alone, the stock tells those
+	# states apart.
+	return weak_etag(f'{product.version}.{product.stock_quantity}')
+
+
+def set_next_cursor(
+	response: Response,
+	results: Sequence,
+	limit: int,
+	order_by: tuple
+) -> None:
+	if results and len(results) == limit:
+		response.headers['X-Next-Cursor'] = cursor_for(
+			results[-1],
+			order_by
+		)
+
+
+def export_response(
+	batches,
+	export_format: ExportFormat,
+	csv_fields: tuple,
+	filename: str
+) -> StreamingResponse:
+	if export_format == ExportFormat.CSV:
+		content = csv_chunks(batches, csv_fields)
+		media_type = 'text/csv'
+	else:
+		content = ndjson_chunks(batches)
+		media_type = 'application/x-ndjson'
+
+	return StreamingResponse(
+		content,
+		media_type=media_type,
+		headers={
+			'Content-Disposition': (
+				f'attachment; filename="{filename}.{export_format.value}"'
+			)
+		}
+	)
+
+
+# Itemless orders still get a row, so every order is in the export.
+NO_ITEM = {
+	'id': None,
+	'product_id': None,
+	'quantity': None,
+	'unit_price': None,
+}
+
+
+async def flatten_order_items(
+	batches
+):
+	async for orders in batches:
+		yield [
+			{
+				'order_id': order['id'],
+				'created_at': order['created_at'],
+				'status': order['status'],
+				'total_amount': order['total_amount'],
+				'item_count': order['item_count'],
+				'item_id': item['id'],
+				'product_id': item['product_id'],
+				'quantity': item['quantity'],
+				'unit_price': item['unit_price'],
+			}
+			for order in orders
+			for item in order['items'] or (NO_ITEM,)
+		]
+
+
 router = APIRouter()
 
+CREATE_ORDER_SCOPE = 'POST /orders/'
+
 
 @router.get(
 	path='/products/',
 	response_model=List[ProductResponse]
 )
 async def list_products(
+	response: Response,
 	limit: int = Query(default=50, le=100),
 	offset: int = Query(0),
-	order_by: str = Query('name')
+	order_by: str = Query('name'),
+	cursor: Optional[str] = Query(None),
+	if_none_match: Optional[str] = Header(None),
+	session: AsyncSession = Depends(get_session)
 ) -> List[ProductResponse]:
 
-	order_by_column = getattr(Product, order_by, None)
+	order_by_column = Product.__table__.columns.get(order_by)
 
-	if not order_by_column:
+	if order_by_column is None:
 		raise HTTPException(
 			status_code=400,
 			detail='Invalid order_by column'
 		)
 
-	products = await product_crud.list(
-		model=Product,
-		limit=limit,
-		offset=offset,
-		order_by=(order_by_column,)
-	)
+	if order_by_column.key == 'stock_quantity':
+		order_by_column = product_stock().label('stock_quantity')
 
-	return check_not_empty(
-		result=products.all(),
+	order_by_columns = (order_by_column, Product.id)
+	try:
+		products = await product_crud.list_products(
+			limit=limit,
+			offset=offset,
+			order_by=order_by_columns,
+			cursor=cursor,
+			session=session
+		)
+	except InvalidCursorError as e:
+		raise HTTPException(
+			status_code=400,
+			detail=str(e)
+		)
+
+	products = check_not_empty(
+		result=products,
 		detail='Empty List'
 	)
+	etag = digest_etag(
+		(product.id, product.version, product.stock_quantity)
+		for product in products
+	)
+	if etag_matches(if_none_match, etag):
+		return not_modified(etag)
+	response.headers['ETag'] = etag
+	set_next_cursor(response, products, limit, order_by_columns)
+
+	return products
 
 
 @router.post(
@@ -83,35 +264,131 @@ async def list_products(
 	response_model=ProductResponse
 )
 async def create_product(
-	product: ProductCreate
+	product: ProductCreate,
+	session: AsyncSession = Depends(get_session)
 ) -> ProductResponse:
-	new_product = await product_crud.create(
-		model=Product,
+	new_product = await product_crud.create_product(
+		session=session,
 		**product.dict()
 	)
+	await commit_session(session)
 	return check_not_empty(
 		result=new_product,
 		detail='Product creation failed'
 	)
 
 
+@router.get(
+	path='/products/export',
+	response_class=StreamingResponse
+)
+async def export_products(
+	export_format: ExportFormat = Query(ExportFormat.NDJSON, alias='format')
+) -> StreamingResponse:
+	return export_response(
+		product_crud.export_products(),
+		export_format,
+		csv_fields=('id', 'name', 'description', 'price', 'stock_quantity'),
+		filename='products'
+	)
+
+
+@router.post(
+	path='/products/import',
+	response_model=ProductImportResponse
+)
+async def bulk_import_products(
+	request: Request
+) -> ProductImportResponse:
+	content_type = request.headers.get('content-type', '')
+	parse = iter_csv if content_type.startswith('text/csv') else iter_ndjson
+
+	return await import_products(
+		parse(iter_lines(
+			request.stream(),
+			max_line_length=settings.product_import_max_line_length
+		))
+	)
+
+
+# Declared before /products/{product_id}, which would match 'batch'
+# and 'search'.
+@router.get(
+	path='/products/batch',
+	response_model=Dict[int, Optional[ProductResponse]]
+)
+async def read_products_batch(
+	ids: str = Query(..., description='Comma separated product ids'),
+	session: AsyncSession = Depends(get_session)
+) -> Response:
+	try:
+		product_ids = batch_ids([int(id_) for id_ in ids.split(',')])
+	except ValueError:
+		raise HTTPException(
+			status_code=400,
+			detail='ids must be comma separated integers'
+		)
+
+	products = await product_crud.get_products(product_ids, session=session)
+
+	return TimedORJSONResponse(
+		content={str(id_): products.get(id_) for id_ in product_ids}
+	)
+
+
+@router.get(
+	path='/products/search',
+	response_model=List[ProductSearchResult]
+)
+async def search_products(
+	response: Response,
+	q: str = Query(..., min_length=1, max_length=200),
+	mode: ProductSearchMode = Query(ProductSearchMode.FULLTEXT),
+	limit: int = Query(default=20, ge=1, le=100),
+	cursor: Optional[str] = Query(None),
+	session: AsyncSession = Depends(get_session)
+) -> List[ProductSearchResult]:
+	try:
+		products, order_by = await product_crud.search_products(
+			query=q,
+			mode=mode,
+			limit=limit,
+			cursor=cursor,
+			session=session
+		)
+	except InvalidCursorError as e:
+		raise HTTPException(
+			status_code=400,
+			detail=str(e)
+		)
+	set_next_cursor(response, products, limit, order_by)
+
+	return products
+
+
 @router.get(
 	path='/products/{product_id}',
 	response_model=ProductResponse
 )
 async def read_product(
-	product_id: int
+	product_id: int,
+	response: Response,
+	if_none_match: Optional[str] = Header(None),
+	session: AsyncSession = Depends(get_session)
 ) -> ProductResponse:
 
-	product = await product_crud.get(
-		model=Product,
-		conditions=(Product.id == product_id,)
-	)
-
-	return check_not_empty(
-		result=product,
+	# Served from the cache as is, other workers' writes show up once
+	# the entry expires, within product_cache_ttl.
+	product = check_not_empty(
+		result=await product_crud.get_product(product_id, session=session),
 		detail='Product not found'
 	)
+	etag = product_etag(product)
+	if etag_matches(if_none_match, etag):
+		return not_modified(etag)
+	response.headers['ETag'] = etag
+
+	return product
 
 
 @router.put(
@@ -120,19 +397,61 @@ async def read_product(
 )
 async def update_product(
 	product_id: int,
-	product_update: ProductUpdate
+	product_update: ProductUpdate,
+	response: Response,
+	if_match: Optional[str] = Header(None),
+	session: AsyncSession = Depends(get_session)
 ) -> ProductResponse:
 
-	updated_product = await product_crud.update(
-		model=Product,
-		condition=Product.id == product_id,
-		**product_update.dict(exclude_unset=True)
-	)
+	try:
+		updated_product = await product_crud.update_product(
+			product_id,
+			versions=parse_versions(if_match),
+			session=session,
+			**product_update.dict(exclude_unset=True)
+		)
+	except VersionConflictError as e:
+		raise HTTPException(
+			status_code=412,
+			detail=e.msg
+		)
+	await commit_session(session)
 
-	return check_not_empty(
+	updated_product = check_not_empty(
 		result=updated_product,
 		detail='Product not found'
 	)
+	response.headers['ETag'] = product_etag(updated_product)
+
+	return updated_product
+
+
+@router.patch(
+	path='/products/{product_id}/stock-shards',
+	response_model=ProductResponse
+)
+async def set_stock_shards(
+	product_id: int,
+	response: Response,
+	shards: int = Query(..., ge=0, le=settings.stock_max_shards),
+	session: AsyncSession = Depends(get_session)
+) -> ProductResponse:
+	# Splits the product's stock over shard rows so concurrent buyers
+	# stop queueing on one row, 0 folds it back into the product row.
+	product = await product_crud.set_stock_shards(
+		product_id,
+		shards,
+		session=session
+	)
+	await commit_session(session)
+
+	product = check_not_empty(
+		result=product,
+		detail='Product not found'
+	)
+	response.headers['ETag'] = product_etag(product)
+
+	return product
 
 
 @router.delete(
@@ -140,51 +459,106 @@ async def update_product(
 	response_model=ProductResponse
 )
 async def delete_product(
-	product_id: int
+	product_id: int,
+	session: AsyncSession = Depends(get_session)
 ) -> ProductResponse:
 
-	product = await product_crud.get(
-		model=Product,
-		conditions=(Product.id == product_id,)
-	)
+	product = await product_crud.delete_product(product_id, session=session)
+	await commit_session(session)
 
-	check_not_empty(
+	return check_not_empty(
 		result=product,
 		detail='Product not found'
 	)
 
-	await product_crud.delete(
-		model=Product,
-		condition=Product.id == product_id
-	)
-
-	return product
-
 
 @router.get('/orders/', response_model=List[OrderResponse])
 async def list_orders(
 	limit: int = Query(default=50, le=100),
 	offset: int = Query(0),
-	order_by: str = Query('created_at')
-) -> List[OrderResponse]:
-
-	order_by_column = getattr(Order, order_by, None)
-	if not order_by_column:
+	order_by: str = Query('created_at'),
+	cursor: Optional[str] = Query(None),
+	status: Optional[List[OrderStatus]] = Query(None),
+	created_from: Optional[datetime] = Query(None),
+	created_to: Optional[datetime] = Query(None),
+	if_none_match: Optional[str] = Header(None),
+	session: AsyncSession = Depends(get_session)
+) -> Response:
+
+	order_by_column = Order.__table__.columns.get(order_by)
+	if order_by_column is None:
 		raise HTTPException(
 			status_code=400,
 			detail='Invalid order_by column'
 		)
 
-	order_responses = await order_crud.list_orders(
-		limit=limit,
-		offset=offset,
-		order_by=order_by
-	)
+	try:
+		rows = await order_crud.list_orders_json(
+			limit=limit,
+			offset=offset,
+			order_by=order_by,
+			cursor=cursor,
+			statuses=status,
+			created_from=created_from,
+			created_to=created_to,
+			session=session
+		)
+	except InvalidCursorError as e:
+		raise HTTPException(
+			status_code=400,
+			detail=str(e)
+		)
 
-	return check_not_empty(
-		result=order_responses,
+	rows = check_not_empty(
+		result=rows,
 		detail='Empty List'
 	)
+	etag = digest_etag((row.id, row.version) for row in rows)
+	if etag_matches(if_none_match, etag):
+		return not_modified(etag)
+	# Rows are already JSON documents, skip response_model validation.
+	response = Response(
+		content=json_array(row.json for row in rows),
+		media_type='application/json',
+		headers={'ETag': etag}
+	)
+	set_next_cursor(
+		response,
+		rows,
+		limit,
+		(order_by_column, Order.id)
+	)
+
+	return response
+
+
+@router.get(
+	path='/orders/export',
+	response_class=StreamingResponse
+)
+async def export_orders(
+	export_format: ExportFormat = Query(ExportFormat.NDJSON, alias='format')
+) -> StreamingResponse:
+	batches = order_crud.export_orders()
+	if export_format == ExportFormat.CSV:
+		batches = flatten_order_items(batches)
+
+	return export_response(
+		batches,
+		export_format,
+		csv_fields=(
+			'order_id',
+			'created_at',
+			'status',
+			'total_amount',
+			'item_count',
+			'item_id',
+			'product_id',
+			'quantity',
+			'unit_price',
+		),
+		filename='orders'
+	)
 
 
 @router.post(
@@ -192,31 +566,112 @@ async def list_orders(
 	response_model=OrderResponse
 )
 async def create_order(
-	order: OrderCreate
-) -> OrderResponse:
+	order: OrderCreate,
+	idempotency_key: Optional[str] = Header(None, max_length=255),
+	session: AsyncSession = Depends(get_session)
+) -> Response:
+	if idempotency_key:
+		request_hash = hashlib.sha256(order.json().encode()).hexdigest()
+		await idempotency_crud.lock(
+			CREATE_ORDER_SCOPE,
+			idempotency_key,
+			session=session
+		)
+		stored = await idempotency_crud.get_response(
+			CREATE_ORDER_SCOPE,
+			idempotency_key,
+			session=session
+		)
+		if stored:
+			if stored.request_hash != request_hash:
+				raise HTTPException(
+					status_code=422,
+					detail='Idempotency-Key was used for a different request'
+				)
+			return Response(
+				content=stored.body,
+				status_code=stored.status_code,
+				media_type='application/json',
+				headers={'Idempotent-Replayed': 'true'}
+			)
+
 	try:
-		new_order = await order_crud.create_order(order=order)
+		new_order = await order_crud.create_order(
+			order=order,
+			session=session
+		)
 	except InsufficientStockError as e:
 		raise HTTPException(
 			status_code=400,
 			detail=e.msg
 		)
-
-	return check_not_empty(
+	new_order = check_not_empty(
 		result=new_order,
 		detail='Order creation failed'
 	)
 
+	# Rendered here so the stored bytes are exactly what is sent.
+	response = TimedORJSONResponse(content=jsonable_encoder(new_order))
+	if idempotency_key:
+		await idempotency_crud.save_response(
+			CREATE_ORDER_SCOPE,
+			idempotency_key,
+			request_hash=request_hash,
+			status_code=response.status_code,
+			body=response.body,
+			ttl=settings.idempotency_key_ttl,
+			session=session
+		)
+	await commit_session(session)
+
+	return response
+
+
+@router.post(
+	path='/orders/batch-get',
+	response_model=Dict[int, Optional[OrderResponse]]
+)
+async def read_orders_batch(
+	batch: OrderBatchGet,
+	session: AsyncSession = Depends(get_session)
+) -> Response:
+	order_ids = batch_ids(batch.ids)
+	orders = await order_crud.get_orders_json(order_ids, session=session)
+
+	# Orders are already JSON documents, skip response_model validation.
+	return Response(
+		content=json_by_id(order_ids, orders),
+		media_type='application/json'
+	)
+
 
 @router.get(
 	path='/orders/{order_id}',
 	response_model=OrderResponse
 )
 async def read_order(
-	order_id: int
+	order_id: int,
+	response: Response,
+	if_none_match: Optional[str] = Header(None),
+	session: AsyncSession = Depends(get_session)
 ) -> OrderResponse:
 
-	order_response = await order_crud.read_order(order_id=order_id)
+	# The version alone answers a matching If-None-Match, the order and
+	# its items are only loaded when the client's copy is stale.
+	version = await order_crud.get_version(order_id, session=session)
+	check_not_empty(
+		result=version,
+		detail='Order not found'
+	)
+	etag = weak_etag(version)
+	if etag_matches(if_none_match, etag):
+		return not_modified(etag)
+
+	order_response = await order_crud.read_order(
+		order_id=order_id,
+		session=session
+	)
+	response.headers['ETag'] = etag
 
 	return check_not_empty(
 		result=order_response,
@@ -230,17 +685,91 @@ async def read_order(
 )
 async def update_order(
 	order_id: int,
-	order_update: OrderUpdate
+	order_update: OrderUpdate,
+	response: Response,
+	if_match: Optional[str] = Header(None),
+	session: AsyncSession = Depends(get_session)
 ) -> OrderResponse:
 
-	updated_order_response = await order_crud.update_order(
-		order_id=order_id,
-		order_update=order_update
+	try:
+		updated_order = await order_crud.update_order(
+			order_id=order_id,
+			order_update=order_update,
+			versions=parse_versions(if_match),
+			session=session
+		)
+	except InsufficientStockError as e:
+		raise HTTPException(
+			status_code=400,
+			detail=e.msg
+		)
+	except VersionConflictError as e:
+		raise HTTPException(
+			status_code=412,
+			detail=e.msg
+		)
+	updated_order_response, version = check_not_empty(
+		result=updated_order,
+		detail='Order not found'
 	)
+	await commit_session(session)
+	response.headers['ETag'] = weak_etag(version)
 
-	return check_not_empty(
-		result=updated_order_response,
-		detail='Order not found'
+	return updated_order_response
+
+
+@router.patch(
+	path='/orders/status',
+	response_model=OrderStatusBulkResponse
+)
+async def transition_orders(
+	transition: OrderStatusBulkUpdate,
+	session: AsyncSession = Depends(get_session)
+) -> OrderStatusBulkResponse:
+	# Without ids every order in the previous status matches, narrowed by
+	# the optional created_from/created_to bounds and capped by limit.
+	if transition.ids is not None and (
+		transition.created_from or transition.created_to
+	):
+		raise HTTPException(
+			status_code=400,
+			detail='Pass either ids or a created_from/created_to filter, not both'
+		)
+	if transition.status not in PREVIOUS_STATUS:
+		raise HTTPException(
+			status_code=400,
+			detail=f'Orders cannot be moved to {transition.status.value}'
+		)
+	# limit only applies to filters, id lists are bounded by their length.
+	if (
+		len(transition.ids) if transition.ids is not None
+		else transition.limit
+	) > settings.order_status_bulk_max:
+		raise HTTPException(
+			status_code=400,
+			detail=f'At most {settings.order_status_bulk_max} orders per request'
+		)
+
+	applied, rejected = await order_crud.transition_orders(
+		transition.status,
+		order_ids=(
+			list(dict.fromkeys(transition.ids))
+			if transition.ids is not None
+			else None
+		),
+		created_from=transition.created_from,
+		created_to=transition.created_to,
+		limit=transition.limit,
+		session=session
+	)
+	await commit_session(session)
+
+	return OrderStatusBulkResponse(
+		applied=applied,
+		rejected=[
+			OrderStatusRejection(id=order_id, status=status)
+			for order_id, status in rejected.items()
+		]
 	)
 
 
@@ -250,13 +779,15 @@ async def update_order(
 )
 async def update_order_status(
 	order_id: int,
-	new_status: OrderStatus
-
+	new_status: OrderStatus,
+	session: AsyncSession = Depends(get_session)
 ) -> OrderResponse:
 	updated_order_response = await order_crud.update_order_status(
 		order_id=order_id,
-		new_status=new_status
+		new_status=new_status,
+		session=session
 	)
+	await commit_session(session)
 
 	return check_not_empty(
 		result=updated_order_response,
@@ -269,9 +800,14 @@ async def update_order_status(
 	response_model=OrderResponse
 )
 async def delete_order(
-	order_id: int
+	order_id: int,
+	session: AsyncSession = Depends(get_session)
 ) -> OrderResponse:
-	order_response = await order_crud.delete_order(order_id=order_id)
+	order_response = await order_crud.delete_order(
+		order_id=order_id,
+		session=session
+	)
+	await commit_session(session)
 
 	return check_not_empty(
 		result=order_response,
@@ -1,5 +1,8 @@
 # Standard Library
-from typing import Optional
+from typing import (
+	Dict,
+	Optional,
+)
 
 # Third Party Library
 from pydantic import (
@@ -17,12 +20,58 @@ class Settings(BaseSettings):
 	postgres_user: str
 	postgres_password: str
 
+	db_pool_size: int = 5
+	db_max_overflow: int = 10
+	db_pool_timeout: float = 30  # seconds
+	db_pool_recycle: int = 1800  # seconds
+	db_pool_pre_ping: bool = False
+	db_statement_cache_size: int = 100
+	db_prepared_statement_cache_size: int = 100
+	db_statement_timeout: Optional[int] = None  # milliseconds
+	db_application_name: Optional[str] = None
+	db_pgbouncer: bool = False
+
 	log_dir: str = 'logs'
 	log_filename: str = 'logs.log'
 	log_level: str = 'INFO'
 	log_rotation: int = 2  # 2 MB
 	log_retention: int = 3  # 3 days
 
+	request_timing: bool = True
+	sql_slow_statement_ms: Optional[float] = None
+	sql_repeated_statement_threshold: Optional[int] = None
+	metrics_enabled: bool = True
+
+	product_cache_size: int = 10000
+	# Invalidation is per process, this bounds how long other workers
+	# serve a product after it changed.
+	product_cache_ttl: float = 5  # seconds
+
+	product_import_chunk_size: int = 1000  # capped by the bind parameter limit
+	product_import_max_errors: int = 1000
+	product_import_max_line_length: int = 65536  # characters
+
+	analytics_refresh_interval: float = 30  # seconds, 0 disables
+	analytics_refresh_batch_size: int = 10000  # orders per transaction
+	# Orders younger than this are left for the next run, so a late
+	# commit of a lower order id is not skipped by the watermark.
+	analytics_settle_seconds: float = 60
+
+	idempotency_key_ttl: float = 86400  # seconds
+	idempotency_purge_interval: float = 3600  # seconds, 0 disables
+
+	outbox_batch_size: int = 100
+	outbox_poll_interval: float = 1  # seconds
+	outbox_max_attempts: int = 10
+	outbox_retry_backoff: float = 1  # seconds, doubled per attempt
+	outbox_retry_backoff_max: float = 300  # seconds
+
+	stock_max_shards: int = 64
+	stock_rebalance_interval: float = 5  # seconds, 0 disables
+
+	batch_get_max_ids: int = 5000
+	order_status_bulk_max: int = 5000
+
 	class Config:
 		env_file = '.env'
 		env_nested_delimiter = '__'
@@ -40,5 +89,34 @@ class Settings(BaseSettings):
 			path=f'/{self.postgres_db}',
 		)
 
+	@property
+	def db_server_settings(
+		self
+	) -> Dict[str, str]:
+		server_settings = {
+			'application_name': self.db_application_name or self.project,
+		}
+		if self.db_statement_timeout is not None:
+			server_settings['statement_timeout'] = str(self.db_statement_timeout)
+		return server_settings
+
+	@property
+	def engine_options(
+		self
+	) -> dict:
+		return {
+			'pool_size': self.db_pool_size,
+			'max_overflow': self.db_max_overflow,
+			'pool_timeout': self.db_pool_timeout,
+			'pool_recycle': self.db_pool_recycle,
+			'pool_pre_ping': self.db_pool_pre_ping,
+			'statement_cache_size': self.db_statement_cache_size,
+			'prepared_statement_cache_size': (
+				self.db_prepared_statement_cache_size
+			),
+			'server_settings': self.db_server_settings,
+			'pgbouncer': self.db_pgbouncer,
+		}
+
 
 settings = Settings()
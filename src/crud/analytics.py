@@ -0,0 +1,237 @@
+# Standard Library
+from datetime import (
+	date,
+	datetime,
+	timedelta,
+)
+from typing import Optional
+
+# Third Party Library
+from sqlalchemy import (
+	BigInteger,
+	Date,
+	and_,
+	cast,
+	func,
+	or_,
+	select,
+)
+from sqlalchemy.dialects.postgresql import insert
+
+# Application Library
+from fastapi_common.crud import BaseCRUD
+from fastapi_common.db import (
+	create_session,
+	transaction,
+)
+from src.crud.product import product_stock
+from src.models import (
+	DailySales,
+	Order,
+	OrderItem,
+	Product,
+	ProductDailySales,
+	RollupWatermark,
+)
+
+
+class AnalyticsCRUD(BaseCRUD):
+	watermark = 'sales'
+
+	async def refresh_rollups(
+		self,
+		batch_size: int,
+		settle_seconds: float
+	) -> int:
+		async with transaction() as session:
+			# Other workers skip the refresh while one holds the row.
+			last_order_id = (await session.execute(
+				select(RollupWatermark.last_order_id).where(
+					RollupWatermark.name == self.watermark
+				).with_for_update(skip_locked=True)
+			)).scalar()
+			if last_order_id is None:
+				return 0
+
+			# Stop before the first order that may still have commits in
+			# flight below it, so no order id is skipped.
+			cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+			unsettled = select(func.min(Order.id)).where(
+				Order.id > last_order_id,
+				Order.created_at >= cutoff
+			).scalar_subquery()
+			batch = select(Order.id).where(
+				Order.id > last_order_id,
+				or_(unsettled.is_(None), Order.id < unsettled)
+			).order_by(Order.id).limit(batch_size).subquery()
+			batch_end, orders = (await session.execute(
+				select(func.max(batch.c.id), func.count())
+			)).one()
+			if not orders:
+				return 0
+
+			window = and_(Order.id > last_order_id, Order.id <= batch_end)
+			day = cast(Order.created_at, Date).label('day')
+			await self._add_daily_sales(day, window, session)
+			await self._add_product_daily_sales(day, window, session)
+			await self.update(
+				model=RollupWatermark,
+				condition=(RollupWatermark.name == self.watermark),
+				session=session,
+				last_order_id=batch_end,
+				refreshed_at=datetime.utcnow()
+			)
+
+		return orders
+
+	@staticmethod
+	async def _add_daily_sales(
+		day,
+		window,
+		session
+	) -> None:
+		query = insert(DailySales).from_select(
+			['day', 'order_count', 'item_count', 'revenue'],
+			select(
+				day,
+				func.count(),
+				func.sum(Order.item_count),
+				func.sum(Order.total_amount),
+			).where(window).group_by(day)
+		)
+		table = DailySales.__table__.c
+		await session.execute(query.on_conflict_do_update(
+			index_elements=['day'],
+			set_={
+				'order_count': table.order_count + query.excluded.order_count,
+				'item_count': table.item_count + query.excluded.item_count,
+				'revenue': table.revenue + query.excluded.revenue,
+			}
+		))
+
+	@staticmethod
+	async def _add_product_daily_sales(
+		day,
+		window,
+		session
+	) -> None:
+		query = insert(ProductDailySales).from_select(
+			['day', 'product_id', 'quantity', 'revenue'],
+			select(
+				day,
+				OrderItem.product_id,
+				func.sum(OrderItem.quantity),
+				func.sum(OrderItem.unit_price * OrderItem.quantity),
+			).join(
+				OrderItem,
+				OrderItem.order_id == Order.id
+			).where(window).group_by(day, OrderItem.product_id)
+		)
+		table = ProductDailySales.__table__.c
+		await session.execute(query.on_conflict_do_update(
+			index_elements=['day', 'product_id'],
+			set_={
+				'quantity': table.quantity + query.excluded.quantity,
+				'revenue': table.revenue + query.excluded.revenue,
+			}
+		))
+
+	async def revenue_per_day(
+		self,
+		date_from: Optional[date] = None,
+		date_to: Optional[date] = None,
+		session=None
+	) -> list:
+		query = select(
+			DailySales.day,
+			DailySales.order_count,
+			DailySales.item_count,
+			DailySales.revenue,
+		).order_by(DailySales.day)
+		if date_from:
+			query = query.where(DailySales.day >= date_from)
+		if date_to:
+			query = query.where(DailySales.day <= date_to)
+
+		async with create_session(session) as session:
+			return (await session.execute(query)).all()
+
+	async def top_products(
+		self,
+		metric: str,
+		limit: int,
+		date_from: Optional[date] = None,
+		date_to: Optional[date] = None,
+		session=None
+	) -> list:
+		totals = select(
+			ProductDailySales.product_id,
+			cast(
+				func.sum(ProductDailySales.quantity),
+				BigInteger
+			).label('quantity'),
+			func.sum(ProductDailySales.revenue).label('revenue'),
+		).group_by(ProductDailySales.product_id)
+		if date_from:
+			totals = totals.where(ProductDailySales.day >= date_from)
+		if date_to:
+			totals = totals.where(ProductDailySales.day <= date_to)
+		totals = totals.order_by(
+			func.sum(getattr(ProductDailySales, metric)).desc(),
+			ProductDailySales.product_id
+		).limit(limit).subquery('totals')
+
+		query = select(
+			totals.c.product_id,
+			Product.name,
+			totals.c.quantity,
+			totals.c.revenue,
+		).outerjoin(
+			Product,
+			Product.id == totals.c.product_id
+		).order_by(totals.c[metric].desc(), totals.c.product_id)
+
+		async with create_session(session) as session:
+			return (await session.execute(query)).all()
+
+	async def stock_velocity(
+		self,
+		days: int,
+		limit: int,
+		session=None
+	) -> list:
+		since = datetime.utcnow().date() - timedelta(days=days - 1)
+		sold = select(
+			ProductDailySales.product_id,
+			cast(
+				func.sum(ProductDailySales.quantity),
+				BigInteger
+			).label('units_sold'),
+		).where(
+			ProductDailySales.day >= since
+		).group_by(ProductDailySales.product_id).subquery('sold')
+
+		per_day = (sold.c.units_sold / float(days)).label('units_per_day')
+		stock_quantity = product_stock()
+		query = select(
+			Product.id.label('product_id'),
+			Product.name,
+			stock_quantity.label('stock_quantity'),
+			sold.c.units_sold,
+			per_day,
+			func.round(
+				stock_quantity / per_day
+			).label('days_of_stock'),
+		).join(
+			sold,
+			sold.c.product_id == Product.id
+		).order_by(
+			sold.c.units_sold.desc(),
+			Product.id
+		).limit(limit)
+
+		async with create_session(session) as session:
+			return (await session.execute(query)).all()
+
+
+analytics_crud = AnalyticsCRUD()
@@ -0,0 +1,92 @@
+# Standard Library
+from datetime import (
+	datetime,
+	timedelta,
+)
+from typing import Optional
+
+# Third Party Library
+from sqlalchemy import (
+	BigInteger,
+	func,
+	select,
+)
+from sqlalchemy.dialects.postgresql import insert
+
+# Application Library
+from fastapi_common.crud import BaseCRUD
+from src.models import IdempotencyKey
+
+
+class IdempotencyCRUD(BaseCRUD):
+
+	async def lock(
+		self,
+		scope: str,
+		key: str,
+		session
+	) -> None:
+		# Held until the request's transaction ends, so a duplicate
+		# waits for the first request and then sees its response.
+		await session.execute(select(func.pg_advisory_xact_lock(
+			func.hashtextextended(f'{scope}:{key}', 0, type_=BigInteger)
+		)))
+
+	async def get_response(
+		self,
+		scope: str,
+		key: str,
+		session
+	) -> Optional[IdempotencyKey]:
+		return await self.get(
+			model=IdempotencyKey,
+			conditions=(
+				IdempotencyKey.scope == scope,
+				IdempotencyKey.key == key,
+				IdempotencyKey.expires_at > datetime.utcnow(),
+			),
+			session=session
+		)
+
+	async def save_response(
+		self,
+		scope: str,
+		key: str,
+		request_hash: str,
+		status_code: int,
+		body: bytes,
+		ttl: float,
+		session
+	) -> None:
+		now = datetime.utcnow()
+		values = {
+			'request_hash': request_hash,
+			'status_code': status_code,
+			'body': body,
+			'created_at': now,
+			'expires_at': now + timedelta(seconds=ttl),
+		}
+		# An expired row for the same key is replaced.
+		await session.execute(
+			insert(IdempotencyKey).values(
+				scope=scope,
+				key=key,
+				**values
+			).on_conflict_do_update(
+				index_elements=['scope', 'key'],
+				set_=values
+			)
+		)
+
+	async def purge_expired(
+		self,
+		session=None
+	) -> None:
+		await self.delete(
+			model=IdempotencyKey,
+			condition=IdempotencyKey.expires_at <= datetime.utcnow(),
+			session=session
+		)
+
+
+idempotency_crud = IdempotencyCRUD()
@@ -0,0 +1,118 @@
+# Standard Library
+from datetime import (
+	datetime,
+	timedelta,
+)
+from typing import List
+
+# Third Party Library
+from sqlalchemy import (
+	String,
+	insert,
+	literal,
+	select,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Application Library
+from fastapi_common.crud import BaseCRUD
+from src.models import OutboxEvent
+
+
+class OutboxCRUD(BaseCRUD):
+
+	async def add(
+		self,
+		topic: str,
+		payload: dict,
+		session
+	) -> None:
+		# Written with the change it describes, so the event exists
+		# exactly when the change was committed.
+		await session.execute(
+			insert(OutboxEvent).values(topic=topic, payload=payload)
+		)
+
+	async def add_many(
+		self,
+		topic: str,
+		payloads,
+		session
+	) -> None:
+		# payloads is a subquery with a json column, the events are
+		# written without the documents passing through Python.
+		now = datetime.utcnow()
+		await session.execute(
+			insert(OutboxEvent).from_select(
+				['topic', 'payload', 'created_at', 'available_at'],
+				select(
+					literal(topic, String),
+					payloads.c.json.cast(JSONB),
+					literal(now),
+					literal(now)
+				)
+			)
+		)
+
+	async def claim(
+		self,
+		batch_size: int,
+		session
+	) -> List[OutboxEvent]:
+		# Rows stay locked until the caller's transaction ends, other
+		# workers skip them instead of waiting.
+		query = self.build_query(
+			model=OutboxEvent,
+			conditions=(
+				OutboxEvent.failed_at.is_(None),
+				OutboxEvent.available_at <= datetime.utcnow(),
+			),
+			order_by=(OutboxEvent.available_at, OutboxEvent.id),
+			limit=batch_size
+		).with_for_update(skip_locked=True)
+
+		return (await session.execute(query)).scalars().all()
+
+	async def complete(
+		self,
+		event_ids: List[int],
+		session
+	) -> None:
+		if not event_ids:
+			return
+		await self.delete(
+			model=OutboxEvent,
+			condition=OutboxEvent.id.in_(event_ids),
+			session=session
+		)
+
+	async def retry_later(
+		self,
+		event: OutboxEvent,
+		error: str,
+		max_attempts: int,
+		backoff: float,
+		max_backoff: float,
+		session
+	) -> bool:
+		now = datetime.utcnow()
+		attempts = event.attempts + 1
+		values = {'attempts': attempts, 'last_error': error}
+		if attempts >= max_attempts:
+			values['failed_at'] = now
+		else:
+			values['available_at'] = now + timedelta(
+				seconds=min(backoff * 2 ** (attempts - 1), max_backoff)
+			)
+		await self.update(
+			model=OutboxEvent,
+			condition=OutboxEvent.id == event.id,
+			synchronize_session=False,
+			session=session,
+			**values
+		)
+
+		return 'failed_at' not in values
+
+
+outbox_crud = OutboxCRUD()
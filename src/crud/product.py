@@ -1,184 +1,1164 @@
 # Standard Library
+from datetime import (
+	datetime,
+	timezone,
+)
 from typing import (
+	AsyncIterator,
 	List,
 	Optional,
-	Dict
+	Dict,
+	Tuple
 )
 
 # Third Party Library
-from sqlalchemy import and_
+import orjson
+from sqlalchemy import (
+	Float,
+	Integer,
+	Numeric,
+	String,
+	Text,
+	and_,
+	any_,
+	bindparam,
+	case,
+	cast,
+	func,
+	literal_column,
+	or_,
+	select,
+	update,
+)
+from sqlalchemy.dialects.postgresql import (
+	ARRAY,
+	REGCLASS,
+	aggregate_order_by,
+	insert,
+)
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
 
 # Application Library
+from fastapi_common.cache import (
+	LRUCache,
+	ReadThroughCache,
+)
 from fastapi_common.crud import BaseCRUD
-from src.errors import InsufficientStockError
+from fastapi_common.db import (
+	after_commit,
+	create_session,
+	transaction,
+)
+from src.conf import settings
+from src.crud.outbox import outbox_crud
+from src.errors import (
+	InsufficientStockError,
+	VersionConflictError,
+)
+from src.metrics import INSUFFICIENT_STOCK
 from src.models import (
 	Product,
+	ProductStockShard,
 	Order,
 	OrderItem
 )
+from src.models.products import (
+	SEARCH_CONFIG,
+	OrderStatus,
+	product_search_vector,
+)
 from src.schemas.product.crud import (
+	ProductResponse,
+	ProductSearchMode,
 	OrderResponse,
 	OrderItemResponse,
 	OrderUpdate
 )
 
 
+# Orders only move forward, each status has the one it is set from.
+PREVIOUS_STATUS = {
+	OrderStatus.SHIPPED: OrderStatus.IN_PROGRESS,
+	OrderStatus.DELIVERED: OrderStatus.SHIPPED,
+}
+
+
+def product_stock():
+	# Sharded products have no up to date stock_quantity, their stock is
+	# the sum of the shards.
+	sharded_stock = select(
+		cast(func.sum(ProductStockShard.quantity), Integer)
+	).where(
+		ProductStockShard.product_id == Product.id
+	).scalar_subquery()
+	return func.coalesce(sharded_stock, Product.stock_quantity)
+
+
+def product_columns() -> list:
+	# Reads report the shard-aware stock, a sharded product's own
+	# stock_quantity is only as fresh as its last rebalance.
+	return [
+		product_stock().label('stock_quantity')
+		if column.key == 'stock_quantity' else column
+		for column in Product.__table__.columns
+	]
+
+
+def _stock_by_ids():
+	# = ANY over an array keeps one SQL string for any number of ids,
+	# an expanding IN renders a new one, and prepares it, per length.
+	return select(
+		Product.id,
+		product_stock()
+	).where(
+		Product.id == any_(cast(bindparam('product_ids'), ARRAY(Integer)))
+	)
+
+
+def _naive_utc(
+	value: datetime
+) -> datetime:
+	# created_at is stored as naive UTC, asyncpg rejects aware values
+	# bound against it.
+	if value.tzinfo is None:
+		return value
+	return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 class ProductCRUD(BaseCRUD):
+	queries = {
+		'product_by_id': lambda: select(*product_columns()).where(
+			Product.id == bindparam('product_id')
+		),
+		'stock_by_ids': _stock_by_ids,
+	}
+
+	def __init__(
+		self,
+		cache: ReadThroughCache
+	):
+		self.cache = cache
+
+	async def get_products(
+		self,
+		product_ids: List[int],
+		session=None
+	) -> Dict[int, dict]:
+		query = select(
+			*(
+				column for column in product_columns()
+				if column.key in ProductResponse.__fields__
+			)
+		).where(
+			Product.id == any_(
+				cast(bindparam('product_ids', value=product_ids), ARRAY(Integer))
+			)
+		)
+
+		async with create_session(session) as session:
+			return {
+				row['id']: dict(row)
+				for row in (await session.execute(query)).mappings()
+			}
+
+	async def get_product(
+		self,
+		product_id: int,
+		session=None
+	) -> Optional[Row]:
+		# Loads through the caller's session, a request never holds a
+		# second connection for a cache miss.
+		return await self.cache.get(
+			product_id,
+			lambda: self._load_product(product_id, session=session)
+		)
+
+	async def _load_product(
+		self,
+		product_id: int,
+		session=None
+	) -> Optional[Row]:
+		return (await self.execute_named(
+			'product_by_id',
+			session=session,
+			product_id=product_id
+		)).first()
+
+	async def create_product(
+		self,
+		session=None,
+		**kwargs
+	) -> Product:
+		product = await self.create(
+			model=Product,
+			session=session,
+			**kwargs
+		)
+		await self.invalidate(product.id, session=session)
+
+		return product
+
+	async def update_product(
+		self,
+		product_id: int,
+		versions: Optional[List[int]] = None,
+		session=None,
+		**kwargs
+	) -> Optional[Product]:
+		condition = Product.id == product_id
+		if versions is not None:
+			condition &= Product.version.in_(versions)
+		async with transaction(session) as session:
+			product = await self.update(
+				model=Product,
+				condition=condition,
+				session=session,
+				version=Product.version + 1,
+				**kwargs
+			)
+			if product is None and versions is not None:
+				current = await self.get(
+					model=Product,
+					conditions=(Product.id == product_id,),
+					session=session
+				)
+				if current:
+					raise VersionConflictError(
+						'Product',
+						product_id,
+						current.version
+					)
+			if product and product.stock_shards and 'stock_quantity' in kwargs:
+				await self._reset_shards([product_id], session=session)
+			elif product and product.stock_shards:
+				product.stock_quantity = (await session.execute(
+					select(product_stock()).where(Product.id == product_id)
+				)).scalar()
+			await self.invalidate(product_id, session=session)
+
+		return product
+
+	async def delete_product(
+		self,
+		product_id: int,
+		session=None
+	) -> Optional[Row]:
+		async with transaction(session) as session:
+			product = await self._load_product(product_id, session=session)
+			if not product:
+				return None
+
+			await self.delete(
+				model=Product,
+				condition=Product.id == product_id,
+				session=session
+			)
+			await self.invalidate(product_id, session=session)
+
+		return product
+
+	async def bulk_upsert(
+		self,
+		rows: List[dict],
+		session=None
+	) -> Tuple[int, int]:
+		inserted = updated = 0
+		async with transaction(session) as session:
+			new_rows = [row for row in rows if row.get('id') is None]
+			if new_rows:
+				result = await session.execute(
+					insert(Product).values([
+						{key: value for key, value in row.items() if key != 'id'}
+						for row in new_rows
+					]).returning(Product.id)
+				)
+				inserted += len(result.all())
+
+			# ON CONFLICT cannot update a row twice in one statement, the
+			# last row for an id wins.
+			upsert_rows = list({
+				row['id']: row for row in rows if row.get('id') is not None
+			}.values())
+			if upsert_rows:
+				query = insert(Product).values(upsert_rows)
+				query = query.on_conflict_do_update(
+					index_elements=[Product.id],
+					set_={
+						**{
+							column: query.excluded[column]
+							for column in upsert_rows[0]
+							if column != 'id'
+						},
+						'version': Product.version + 1,
+					}
+				).returning(literal_column('xmax = 0'))
+				created = (await session.execute(query)).scalars().all()
+				inserted += sum(created)
+				updated += len(created) - sum(created)
+				await self._sync_id_sequence(
+					max(row['id'] for row in upsert_rows),
+					session=session
+				)
+				if 'stock_quantity' in upsert_rows[0]:
+					await self._reset_shards(
+						[row['id'] for row in upsert_rows],
+						session=session
+					)
+				await self.invalidate(
+					*(row['id'] for row in upsert_rows),
+					session=session
+				)
+
+		return inserted, updated
+
+	async def _sync_id_sequence(
+		self,
+		max_id: int,
+		session
+	) -> None:
+		# Explicit ids bypass the serial sequence, move it past them so
+		# later inserts do not collide.
+		sequence = func.pg_get_serial_sequence(Product.__tablename__, 'id')
+		await session.execute(
+			select(
+				func.setval(
+					sequence,
+					func.greatest(
+						func.coalesce(
+							func.pg_sequence_last_value(cast(sequence, REGCLASS)),
+							0
+						),
+						max_id
+					)
+				)
+			)
+		)
+
+	@staticmethod
+	def _search_condition(
+		query: str,
+		mode: ProductSearchMode
+	) -> tuple:
+		if mode == ProductSearchMode.AUTOCOMPLETE:
+			# Both operators are answered by the trigram index, the
+			# similarity one tolerates typos in what was typed so far.
+			prefix = (
+				query.replace('\\', '\\\\')
+				.replace('%', '\\%')
+				.replace('_', '\\_')
+			)
+			condition = or_(
+				Product.name.ilike(prefix + '%'),
+				Product.name.op('%>')(query)
+			)
+			rank = func.word_similarity(query, Product.name, type_=Float)
+		else:
+			vector = product_search_vector(Product.name, Product.description)
+			tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+			condition = vector.op('@@')(tsquery)
+			rank = func.ts_rank_cd(vector, tsquery, type_=Float)
+
+		return condition, rank.label('rank')
+
+	async def list_products(
+		self,
+		limit: int,
+		offset: int,
+		order_by: tuple,
+		cursor: Optional[str] = None,
+		session=None
+	) -> list:
+		query = self.build_query(
+			model=Product,
+			order_by=order_by,
+			limit=limit,
+			offset=offset,
+			cursor=cursor
+		).with_only_columns(*product_columns())
+
+		async with create_session(session) as session:
+			return (await session.execute(query)).all()
+
+	async def search_products(
+		self,
+		query: str,
+		mode: ProductSearchMode,
+		limit: int,
+		cursor: Optional[str] = None,
+		session=None
+	) -> Tuple[list, tuple]:
+		condition, rank = self._search_condition(query, mode)
+		order_by = (rank.desc(), Product.id)
+		statement = self.build_query(
+			model=Product,
+			conditions=(condition,),
+			order_by=order_by,
+			limit=limit,
+			cursor=cursor
+		).with_only_columns(*product_columns(), rank)
+
+		async with create_session(session) as session:
+			return (await session.execute(statement)).all(), order_by
+
+	async def export_products(
+		self,
+		chunk_size: int = 1000
+	) -> AsyncIterator[List[dict]]:
+		query = select(*product_columns()).order_by(Product.id)
+		async for partition in self.stream(query, chunk_size=chunk_size):
+			yield [dict(row) for row in partition]
+
+	async def invalidate(
+		self,
+		*product_ids: int,
+		session=None
+	) -> None:
+		if session is None:
+			await self.cache.invalidate(*product_ids)
+		else:
+			# Readers could cache the old row again before the write
+			# is visible, so wait for the commit.
+			after_commit(
+				session,
+				lambda: self.cache.invalidate(*product_ids)
+			)
+
 	async def check_stock(
 		self,
-		product_ids: List[int]
+		product_ids: List[int],
+		session=None
 	) -> Dict[int, int]:
-		stock_check_results = await self.list(
+		return dict((await self.execute_named(
+			'stock_by_ids',
+			session=session,
+			product_ids=list(product_ids)
+		)).all())
+
+	async def reserve_stock(
+		self,
+		quantities: Dict[int, int],
+		session=None
+	) -> List[Product]:
+		return await self.adjust_stock(
+			{
+				product_id: -quantity
+				for product_id, quantity in quantities.items()
+			},
+			session=session
+		)
+
+	async def adjust_stock(
+		self,
+		deltas: Dict[int, int],
+		session=None
+	) -> List[Product]:
+		async with transaction(session) as session:
+			adjusted_products = await self._adjust_stock(
+				deltas,
+				session=session
+			)
+			if len(adjusted_products) < len(deltas):
+				await self._raise_insufficient_stock(
+					{
+						product_id: -delta
+						for product_id, delta in deltas.items()
+					},
+					adjusted_products,
+					session=session
+				)
+			await self.invalidate(*deltas, session=session)
+			return adjusted_products
+
+	async def release_stock(
+		self,
+		quantities: Dict[int, int],
+		session=None
+	) -> List[Product]:
+		async with transaction(session) as session:
+			released_products = await self._adjust_stock(
+				quantities,
+				session=session
+			)
+			await self.invalidate(*quantities, session=session)
+			return released_products
+
+	async def _adjust_stock(
+		self,
+		deltas: Dict[int, int],
+		session
+	) -> List[Product]:
+		if not deltas:
+			return []
+
+		product_ids = sorted(deltas)
+		# Sharded products are left unlocked, their rows are what the
+		# shards keep buyers from queueing on.
+		locked = select(Product.id).where(
+			Product.id == any_(
+				cast(bindparam('locked_ids', value=product_ids), ARRAY(Integer))
+			),
+			Product.stock_shards == 0
+		).order_by(Product.id).with_for_update().cte('locked')
+		requested = select(
+			func.unnest(
+				cast(bindparam('product_ids', value=product_ids), ARRAY(Integer))
+			).label('product_id'),
+			func.unnest(
+				cast(
+					bindparam(
+						'deltas',
+						value=[deltas[product_id] for product_id in product_ids]
+					),
+					ARRAY(Integer)
+				)
+			).label('delta'),
+		).subquery('requested')
+
+		adjusted = await self.update(
 			model=Product,
-			conditions=(Product.id.in_(product_ids),),
+			condition=and_(
+				Product.id == locked.c.id,
+				Product.id == requested.c.product_id,
+				Product.stock_quantity + requested.c.delta >= 0
+			),
+			session=session,
+			many=True,
+			synchronize_session=False,
+			version=Product.version + 1,
+			stock_quantity=Product.stock_quantity + requested.c.delta
 		)
-		results = {
-			product.id: product.stock_quantity
-			for product in stock_check_results
-		}
+		if len(adjusted) < len(deltas):
+			adjusted_ids = {product.id for product in adjusted}
+			adjusted += await self._adjust_sharded_stock(
+				{
+					product_id: delta
+					for product_id, delta in deltas.items()
+					if product_id not in adjusted_ids
+				},
+				session=session
+			)
+
+		return adjusted
+
+	async def _adjust_sharded_stock(
+		self,
+		deltas: Dict[int, int],
+		session
+	) -> List[Product]:
+		# Products without shards fall through all three and are left
+		# out, like products without enough stock.
+		adjusted = []
+		for product_id in sorted(deltas):
+			delta = deltas[product_id]
+			product = (
+				await self._adjust_any_shard(product_id, delta, True, session)
+				or await self._adjust_any_shard(product_id, delta, False, session)
+				or await self._adjust_all_shards(product_id, delta, session)
+			)
+			if product:
+				adjusted.append(product)
 
-		return results
+		return adjusted
 
-	async def update_stock_quantity(
+	async def _adjust_any_shard(
 		self,
 		product_id: int,
-		new_stock_quantity: int
-	) -> None:
-		await self.update(
+		delta: int,
+		skip_locked: bool,
+		session
+	) -> Optional[Product]:
+		# A random shard that can take the change, first among those no
+		# other buyer holds, then waiting for one. Otherwise the pick is
+		# not locked, a locking pick keeps every row it waits for and
+		# then rejects on recheck.
+		shard = select(ProductStockShard.shard).where(
+			ProductStockShard.product_id == product_id,
+			ProductStockShard.quantity + delta >= 0
+		).order_by(
+			func.random()
+		).limit(1)
+		if skip_locked:
+			shard = shard.with_for_update(skip_locked=True)
+		query = update(ProductStockShard).where(
+			ProductStockShard.product_id == product_id,
+			ProductStockShard.shard == shard.scalar_subquery(),
+			ProductStockShard.quantity + delta >= 0,
+			Product.id == ProductStockShard.product_id
+		).values(
+			quantity=ProductStockShard.quantity + delta
+		).returning(
+			*Product.__table__.columns
+		).execution_options(
+			synchronize_session=False
+		)
+
+		# A miss can still hold the row it rechecked, rolling back the
+		# savepoint lets the fallbacks wait holding no shard of this
+		# product, otherwise buyers deadlock on each other's shards.
+		savepoint = await session.begin_nested()
+		result = await session.execute(query)
+		fields = result.keys()
+		row = result.first()
+		if not row:
+			await savepoint.rollback()
+			return None
+		await savepoint.commit()
+
+		return Product(**dict(zip(fields, row)))
+
+	async def _adjust_all_shards(
+		self,
+		product_id: int,
+		delta: int,
+		session
+	) -> Optional[Product]:
+		# No single shard can take it, wait for all of them and spread
+		# the change, taking from the fullest shards first.
+		quantities = await self._lock_shards(product_id, session=session)
+		if not quantities or sum(quantities.values()) + delta < 0:
+			return None
+
+		for shard in sorted(
+			quantities,
+			key=quantities.get,
+			reverse=delta < 0
+		):
+			change = delta if delta > 0 else max(delta, -quantities[shard])
+			quantities[shard] += change
+			delta -= change
+			if not delta:
+				break
+		await self._write_shards(product_id, quantities, session=session)
+
+		return await self.get(
 			model=Product,
-			condition=(Product.id == product_id),
-			stock_quantity=new_stock_quantity
+			conditions=(Product.id == product_id,),
+			session=session
+		)
+
+	async def _lock_shards(
+		self,
+		product_id: int,
+		session
+	) -> Dict[int, int]:
+		return dict((await session.execute(
+			select(
+				ProductStockShard.shard,
+				ProductStockShard.quantity
+			).where(
+				ProductStockShard.product_id == product_id
+			).order_by(
+				ProductStockShard.shard
+			).with_for_update()
+		)).all())
+
+	async def _write_shards(
+		self,
+		product_id: int,
+		quantities: Dict[int, int],
+		session
+	) -> None:
+		query = insert(ProductStockShard).values([
+			{'product_id': product_id, 'shard': shard, 'quantity': quantity}
+			for shard, quantity in sorted(quantities.items())
+		])
+		await session.execute(query.on_conflict_do_update(
+			index_elements=[
+				ProductStockShard.product_id,
+				ProductStockShard.shard
+			],
+			set_={'quantity': query.excluded.quantity}
+		))
+
+	@staticmethod
+	def _spread(
+		total: int,
+		shards: int
+	) -> Dict[int, int]:
+		share, remainder = divmod(total, shards)
+		return {shard: share + (shard < remainder) for shard in range(shards)}
+
+	async def _lock_product(
+		self,
+		product_id: int,
+		session
+	) -> Optional[Product]:
+		# FOR NO KEY UPDATE, buyers only need KEY SHARE for the order
+		# items foreign key and keep going.
+		return (await session.execute(
+			select(Product).where(
+				Product.id == product_id
+			).with_for_update(key_share=True)
+		)).scalar()
+
+	async def _reset_shards(
+		self,
+		product_ids: List[int],
+		session
+	) -> None:
+		# stock_quantity was set outright, spread it over the shards.
+		products = (await session.execute(
+			select(
+				Product.id,
+				Product.stock_shards,
+				Product.stock_quantity
+			).where(
+				Product.id.in_(product_ids),
+				Product.stock_shards > 0
+			).order_by(Product.id)
+		)).all()
+		for product_id, shards, stock_quantity in products:
+			await self._lock_shards(product_id, session=session)
+			await self._write_shards(
+				product_id,
+				self._spread(stock_quantity, shards),
+				session=session
+			)
+
+	async def set_stock_shards(
+		self,
+		product_id: int,
+		shards: int,
+		session=None
+	) -> Optional[Product]:
+		async with transaction(session) as session:
+			product = await self._lock_product(product_id, session=session)
+			if not product:
+				return None
+
+			quantities = await self._lock_shards(product_id, session=session)
+			stock_quantity = (
+				sum(quantities.values())
+				if product.stock_shards
+				else product.stock_quantity
+			)
+			await self.delete(
+				model=ProductStockShard,
+				condition=and_(
+					ProductStockShard.product_id == product_id,
+					ProductStockShard.shard >= shards
+				),
+				session=session
+			)
+			if shards:
+				await self._write_shards(
+					product_id,
+					self._spread(stock_quantity, shards),
+					session=session
+				)
+			product = await self.update(
+				model=Product,
+				condition=Product.id == product_id,
+				session=session,
+				stock_shards=shards,
+				stock_quantity=stock_quantity,
+				version=Product.version + 1
+			)
+			await self.invalidate(product_id, session=session)
+
+		return product
+
+	async def rebalance_stock(
+		self,
+		product_id: int
+	) -> bool:
+		async with transaction() as session:
+			product = await self._lock_product(product_id, session=session)
+			if not product or not product.stock_shards:
+				return False
+
+			quantities = await self._lock_shards(product_id, session=session)
+			stock_quantity = sum(quantities.values())
+			balanced = self._spread(stock_quantity, product.stock_shards)
+			if quantities != balanced:
+				await self._write_shards(product_id, balanced, session=session)
+			if product.stock_quantity != stock_quantity:
+				await self.update(
+					model=Product,
+					condition=Product.id == product_id,
+					session=session,
+					stock_quantity=stock_quantity,
+					version=Product.version + 1
+				)
+				await self.invalidate(product_id, session=session)
+
+		return quantities != balanced
+
+	async def list_sharded_products(
+		self
+	) -> List[int]:
+		async with create_session() as session:
+			return (await session.execute(
+				select(Product.id).where(
+					Product.stock_shards > 0
+				).order_by(Product.id)
+			)).scalars().all()
+
+	async def _raise_insufficient_stock(
+		self,
+		quantities: Dict[int, int],
+		reserved_products: List[Product],
+		session
+	) -> None:
+		rejected_ids = sorted(
+			set(quantities) - {product.id for product in reserved_products}
+		)
+		stock_dict = await self.check_stock(
+			rejected_ids,
+			session=session
+		)
+		product_id = rejected_ids[0]
+		INSUFFICIENT_STOCK.inc()
+		raise InsufficientStockError(
+			product_id=product_id,
+			available_stock=stock_dict.get(product_id, 0),
+			requested_quantity=quantities[product_id]
 		)
 
 
 class OrderCRUD(BaseCRUD):
+	queries = {
+		'order_by_id': lambda: select(Order).where(
+			Order.id == bindparam('order_id')
+		).options(selectinload(Order.items)),
+		'order_version_by_id': lambda: select(Order.version).where(
+			Order.id == bindparam('order_id')
+		),
+		'items_by_order': lambda: select(OrderItem).where(
+			OrderItem.order_id == bindparam('order_id')
+		).order_by(OrderItem.id),
+	}
 
 	def _format_order_response(
 		self,
-		order: Order
+		order: Order,
+		items: Optional[List[OrderItem]] = None
 	) -> OrderResponse:
 		order_items_response = [
 			OrderItemResponse(
 				id=item.id,
 				product_id=item.product_id,
-				quantity=item.quantity
+				quantity=item.quantity,
+				unit_price=item.unit_price
 			)
-			for item in order.items
+			for item in (order.items if items is None else items)
 		]
 
 		return OrderResponse(
 			id=order.id,
 			created_at=order.created_at,
 			status=order.status,
+			total_amount=order.total_amount,
+			item_count=order.item_count,
 			items=order_items_response
 		)
 
+	@staticmethod
+	async def _publish(
+		topic: str,
+		order_response: OrderResponse,
+		session
+	) -> None:
+		await outbox_crud.add(
+			topic,
+			orjson.loads(order_response.json()),
+			session=session
+		)
+
 	async def delete_order(
 		self,
-		order_id: int
+		order_id: int,
+		session=None
 	) -> Optional[OrderResponse]:
-		order = await self.get(
-			model=Order,
-			conditions=(Order.id == order_id,),
-			options=(selectinload(Order.items),)
-		)
-		if not order:
-			return None
+		async with transaction(session) as session:
+			order = await self.get_named(
+				'order_by_id',
+				session=session,
+				order_id=order_id
+			)
+			if not order:
+				return None
 
-		await self.delete(
-			model=OrderItem,
-			condition=OrderItem.order_id == order_id
-		)
-		await self.delete(
-			model=Order,
-			condition=Order.id == order_id
-		)
+			await self.delete(
+				model=OrderItem,
+				condition=OrderItem.order_id == order_id,
+				session=session
+			)
+			await self.delete(
+				model=Order,
+				condition=Order.id == order_id,
+				session=session
+			)
+			order_response = self._format_order_response(order)
+			await self._publish('order.deleted', order_response, session)
 
-		return self._format_order_response(order)
+		return order_response
 
 	async def read_order(
 		self,
-		order_id: int
+		order_id: int,
+		session=None
 	) -> Optional[OrderResponse]:
-		order = await self.get(
-			model=Order,
-			conditions=(Order.id == order_id,),
-			options=(selectinload(Order.items),)
+		order = await self.get_named(
+			'order_by_id',
+			session=session,
+			order_id=order_id
 		)
 		if not order:
 			return None
 
 		return self._format_order_response(order)
 
-	async def update_order(
+	async def get_version(
 		self,
 		order_id: int,
-		order_update: OrderUpdate
-	) -> Optional[OrderResponse]:
-		current_order = await self.get(
-			model=Order,
-			conditions=(Order.id == order_id,)
+		session=None
+	) -> Optional[int]:
+		return await self.get_named(
+			'order_version_by_id',
+			session=session,
+			order_id=order_id
 		)
 
-		if not current_order or not order_update.items:
-			return None
+	async def update_order(
+		self,
+		order_id: int,
+		order_update: OrderUpdate,
+		versions: Optional[List[int]] = None,
+		session=None
+	) -> Optional[Tuple[OrderResponse, int]]:
+		quantities = {
+			item.product_id: item.quantity
+			for item in order_update.items or ()
+		}
+
+		async with transaction(session) as session:
+			# Locking the order serialises concurrent edits, otherwise
+			# both would diff against the same items and skew stock.
+			current_order = await self.get(
+				model=Order,
+				conditions=(Order.id == order_id,),
+				options=(selectinload(Order.items),),
+				for_update=True,
+				session=session
+			)
+
+			if not current_order:
+				return None
+			if versions is not None and current_order.version not in versions:
+				raise VersionConflictError(
+					'Order',
+					order_id,
+					current_order.version
+				)
+			if not quantities:
+				return None
 
-		for item in order_update.items:
-			await self._update_or_create_order_item(
+			items = {item.product_id: item for item in current_order.items}
+			changed = {
+				product_id: quantity
+				for product_id, quantity in quantities.items()
+				if product_id not in items
+				or items[product_id].quantity != quantity
+			}
+
+			old_quantities = {
+				product_id: items[product_id].quantity if product_id in items else 0
+				for product_id in changed
+			}
+			products = await product_crud.adjust_stock(
+				{
+					product_id: old_quantities[product_id] - quantity
+					for product_id, quantity in changed.items()
+				},
+				session=session
+			)
+			# Existing lines keep the price they were ordered at, new
+			# lines take the current price.
+			prices = {product.id: product.price for product in products}
+			prices.update({
+				product_id: items[product_id].unit_price
+				for product_id in changed
+				if product_id in items
+			})
+			for item in await self._upsert_order_items(
 				order_id,
-				item
+				changed,
+				prices,
+				session=session
+			):
+				items[item.product_id] = item
+
+			if changed:
+				current_order = await self._add_to_totals(
+					order_id,
+					amount=sum(
+						prices[product_id] * (quantity - old_quantities[product_id])
+						for product_id, quantity in changed.items()
+					),
+					count=sum(
+						quantity - old_quantities[product_id]
+						for product_id, quantity in changed.items()
+					),
+					session=session
+				)
+
+			order_response = self._format_order_response(
+				current_order,
+				sorted(items.values(), key=lambda item: item.id)
 			)
+			if changed:
+				await self._publish('order.updated', order_response, session)
+
+		return order_response, current_order.version
 
-		updated_order = await self.get(
+	async def _add_to_totals(
+		self,
+		order_id: int,
+		amount: float,
+		count: int,
+		session
+	) -> Order:
+		return await self.update(
 			model=Order,
-			conditions=(Order.id == order_id,),
-			options=(selectinload(Order.items),)
+			condition=(Order.id == order_id),
+			session=session,
+			synchronize_session=False,
+			total_amount=func.round(
+				cast(Order.total_amount + amount, Numeric),
+				2
+			),
+			item_count=Order.item_count + count,
+			version=Order.version + 1
 		)
 
-		return self._format_order_response(updated_order)
-
-	async def _update_or_create_order_item(
+	async def _upsert_order_items(
 		self,
 		order_id: int,
-		item
-	) -> None:
-		condition = and_(
-			OrderItem.order_id == order_id,
-			OrderItem.product_id == item.product_id
-		)
+		quantities: Dict[int, int],
+		prices: Dict[int, float],
+		session
+	) -> List[OrderItem]:
+		if not quantities:
+			return []
 
-		existing_item = await self.get(
-			model=OrderItem,
-			conditions=condition
-		)
+		query = insert(OrderItem).values([
+			{
+				'order_id': order_id,
+				'product_id': product_id,
+				'quantity': quantity,
+				'unit_price': prices[product_id]
+			}
+			for product_id, quantity in quantities.items()
+		])
+		query = query.on_conflict_do_update(
+			constraint='uq_order_items_order_id_product_id',
+			set_={'quantity': query.excluded.quantity}
+		).returning(*OrderItem.__table__.columns)
 
-		if existing_item:
-			await self.update(
-				model=OrderItem,
-				condition=condition,
-				quantity=item.quantity
-			)
-		else:
-			await self.create(
-				model=OrderItem,
-				order_id=order_id,
-				product_id=item.product_id,
-				quantity=item.quantity
+		result = await session.execute(query)
+		fields = result.keys()
+		return [OrderItem(**dict(zip(fields, row))) for row in result]
+
+	async def export_orders(
+		self,
+		chunk_size: int = 1000
+	) -> AsyncIterator[List[dict]]:
+		query = select(
+			Order.id,
+			Order.created_at,
+			Order.status,
+			Order.total_amount,
+			Order.item_count,
+			OrderItem.id.label('item_id'),
+			OrderItem.product_id,
+			OrderItem.quantity,
+			OrderItem.unit_price,
+		).outerjoin(
+			OrderItem,
+			OrderItem.order_id == Order.id
+		).order_by(Order.id, OrderItem.id)
+
+		# Items arrive next to their order, an order spanning two
+		# partitions is held back until its last item is read.
+		current = None
+		async for partition in self.stream(query, chunk_size=chunk_size):
+			orders = []
+			for row in partition:
+				if current is None or current['id'] != row['id']:
+					if current is not None:
+						orders.append(current)
+					current = {
+						'id': row['id'],
+						'created_at': row['created_at'],
+						'status': row['status'],
+						'total_amount': row['total_amount'],
+						'item_count': row['item_count'],
+						'items': [],
+					}
+				if row['item_id'] is not None:
+					current['items'].append({
+						'id': row['item_id'],
+						'product_id': row['product_id'],
+						'quantity': row['quantity'],
+						'unit_price': row['unit_price'],
+					})
+			if orders:
+				yield orders
+
+		if current is not None:
+			yield [current]
+
+	@staticmethod
+	def _order_conditions(
+		statuses: Optional[List[OrderStatus]] = None,
+		created_from: Optional[datetime] = None,
+		created_to: Optional[datetime] = None
+	) -> tuple:
+		status_condition = None
+		if statuses and len(set(statuses)) == 1:
+			# Inlined so generic plans of prepared statements can still
+			# match the partial index on open orders.
+			status_condition = Order.status == bindparam(
+				'status_filter',
+				value=statuses[0],
+				type_=Order.status.type,
+				literal_execute=True
 			)
+		elif statuses:
+			status_condition = Order.status.in_(statuses)
+
+		return (
+			status_condition,
+			Order.created_at >= _naive_utc(created_from) if created_from else None,
+			Order.created_at < _naive_utc(created_to) if created_to else None,
+		)
 
 	async def list_orders(
 		self,
 		limit: int,
 		offset: int,
-		order_by: str
+		order_by: str,
+		cursor: Optional[str] = None,
+		statuses: Optional[List[OrderStatus]] = None,
+		created_from: Optional[datetime] = None,
+		created_to: Optional[datetime] = None,
+		session=None
 	) -> List[OrderResponse]:
 		orders = await self.list(
 			model=Order,
+			conditions=self._order_conditions(
+				statuses,
+				created_from,
+				created_to
+			),
 			limit=limit,
 			offset=offset,
-			order_by=(getattr(Order, order_by),),
-			options=(selectinload(Order.items),)
+			order_by=(Order.__table__.columns[order_by], Order.id),
+			options=(selectinload(Order.items),),
+			cursor=cursor,
+			session=session
 		)
 		orders = [
 			self._format_order_response(order)
@@ -187,93 +1167,322 @@ class OrderCRUD(BaseCRUD):
 
 		return orders
 
-	async def create_order(
-		self,
-		order
-	) -> Optional[OrderResponse]:
-		await self._check_stock_availability(order)
+	@staticmethod
+	def _isoformat(
+		column
+	):
+		# Same text as datetime.isoformat(), json_build_object would drop
+		# trailing zeros of the microseconds.
+		return func.to_char(
+			column,
+			'YYYY-MM-DD"T"HH24:MI:SS',
+			type_=String
+		) + case(
+			(func.to_char(column, 'US', type_=String) == '000000', ''),
+			else_=func.to_char(column, '.US', type_=String)
+		)
 
-		new_order = await self.create(
+	async def list_orders_json(
+		self,
+		limit: int,
+		offset: int,
+		order_by: str,
+		cursor: Optional[str] = None,
+		statuses: Optional[List[OrderStatus]] = None,
+		created_from: Optional[datetime] = None,
+		created_to: Optional[datetime] = None,
+		session=None
+	) -> list:
+		page = self.build_query(
 			model=Order,
-			status=order.status
+			conditions=self._order_conditions(
+				statuses,
+				created_from,
+				created_to
+			),
+			limit=limit,
+			offset=offset,
+			order_by=(Order.__table__.columns[order_by], Order.id),
+			cursor=cursor
+		).subquery('page')
+		query = self._order_documents(page).add_columns(
+			page.c[order_by]
+		).order_by(
+			page.c[order_by],
+			page.c.id
 		)
 
-		await self._create_order_items(
-			new_order.id,
-			order.items
-		)
+		async with create_session(session) as session:
+			return (await session.execute(query)).all()
 
-		updated_order = await self.get(
-			model=Order,
-			conditions=(Order.id == new_order.id,),
-			options=(selectinload(Order.items),)
-		)
+	async def get_orders_json(
+		self,
+		order_ids: List[int],
+		session=None
+	) -> Dict[int, str]:
+		page = select(Order).where(
+			Order.id == any_(
+				cast(bindparam('order_ids', value=order_ids), ARRAY(Integer))
+			)
+		).subquery('page')
 
-		return self._format_order_response(updated_order)
+		async with create_session(session) as session:
+			return {
+				row.id: row.json
+				for row in await session.execute(self._order_documents(page))
+			}
 
-	async def _check_stock_availability(
+	def _order_documents(
 		self,
-		order
-	) -> None:
-		stock_dict = await product_crud.check_stock(
-			[item.product_id for item in order.items])
-
-		for item in order.items:
-			available_stock = stock_dict.get(item.product_id, 0)
-			if available_stock < item.quantity:
-				raise InsufficientStockError(
-					product_id=item.product_id,
-					available_stock=available_stock,
-					requested_quantity=item.quantity
+		page
+	):
+		# Items are aggregated and the whole order is rendered to JSON by
+		# Postgres, nothing is hydrated or validated on the Python side.
+		items = func.coalesce(
+			func.json_agg(
+				aggregate_order_by(
+					func.json_build_object(
+						'id', OrderItem.id,
+						'product_id', OrderItem.product_id,
+						'quantity', OrderItem.quantity,
+						'unit_price', OrderItem.unit_price,
+					),
+					OrderItem.id
 				)
+			).filter(OrderItem.id.isnot(None)),
+			literal_column("'[]'::json")
+		)
+		status = case(
+			{status.name: status.value for status in OrderStatus},
+			value=cast(page.c.status, String)
+		)
+		return select(
+			page.c.id,
+			page.c.version,
+			cast(
+				func.json_build_object(
+					'id', page.c.id,
+					'created_at', self._isoformat(page.c.created_at),
+					'status', status,
+					'total_amount', page.c.total_amount,
+					'item_count', page.c.item_count,
+					'items', items,
+				),
+				Text
+			).label('json'),
+		).outerjoin(
+			OrderItem,
+			OrderItem.order_id == page.c.id
+		).group_by(
+			*page.c
+		)
 
-	async def _create_order_items(
+	async def create_order(
 		self,
-		order_id: int,
-		items
-	) -> None:
-		stock_dict = await product_crud.check_stock(
-			[item.product_id for item in items])
+		order,
+		session=None
+	) -> Optional[OrderResponse]:
+		quantities = self._sum_quantities(order.items)
 
-		for item in items:
-			await self.create(
-				model=OrderItem,
-				order_id=order_id,
-				product_id=item.product_id,
-				quantity=item.quantity
+		async with transaction(session) as session:
+			products = await product_crud.reserve_stock(
+				quantities,
+				session=session
 			)
-			new_stock_quantity = stock_dict[item.product_id] - item.quantity
-			await product_crud.update_stock_quantity(
-				product_id=item.product_id,
-				new_stock_quantity=new_stock_quantity
+			prices = {product.id: product.price for product in products}
+			new_order, = await self.create_many(
+				model=Order,
+				values=[{
+					'status': order.status,
+					'total_amount': round(
+						sum(
+							prices[product_id] * quantity
+							for product_id, quantity in quantities.items()
+						),
+						2
+					),
+					'item_count': sum(quantities.values()),
+				}],
+				session=session
+			)
+			items = await self._create_order_items(
+				new_order.id,
+				quantities,
+				prices,
+				session=session
 			)
+			order_response = self._format_order_response(new_order, items)
+			await self._publish('order.created', order_response, session)
+
+		return order_response
+
+	@staticmethod
+	def _sum_quantities(
+		items
+	) -> Dict[int, int]:
+		quantities = {}
+		for item in items:
+			quantities[item.product_id] = (
+				quantities.get(item.product_id, 0) + item.quantity
+			)
+
+		return quantities
+
+	async def _create_order_items(
+		self,
+		order_id: int,
+		quantities: Dict[int, int],
+		prices: Dict[int, float],
+		session
+	) -> List[OrderItem]:
+		if not quantities:
+			return []
+
+		return await self.create_many(
+			model=OrderItem,
+			values=[
+				{
+					'order_id': order_id,
+					'product_id': product_id,
+					'quantity': quantity,
+					'unit_price': prices[product_id]
+				}
+				for product_id, quantity in quantities.items()
+			],
+			session=session
+		)
 
 	async def update_order_status(
 		self,
 		order_id: int,
-		new_status: str
+		new_status: str,
+		session=None
 	) -> Optional[OrderResponse]:
-		order = await self.get(
-			model=Order,
-			conditions=(Order.id == order_id,)
-		)
-		if not order:
-			return None
+		async with transaction(session) as session:
+			updated_order = await self.update(
+				model=Order,
+				condition=(Order.id == order_id),
+				session=session,
+				synchronize_session=False,
+				status=new_status,
+				version=Order.version + 1
+			)
+			if not updated_order:
+				return None
 
-		await self.update(
-			model=Order,
-			condition=(Order.id == order_id),
-			status=new_status
-		)
+			items = (await self.execute_named(
+				'items_by_order',
+				session=session,
+				order_id=order_id
+			)).scalars().all()
+			order_response = self._format_order_response(updated_order, items)
+			await self._publish(
+				'order.status_changed',
+				order_response,
+				session
+			)
 
-		updated_order = await self.get(
-			model=Order,
-			conditions=(Order.id == order_id,),
-			options=(selectinload(Order.items),)
-		)
+		return order_response
 
-		return self._format_order_response(updated_order)
+	async def transition_orders(
+		self,
+		new_status: OrderStatus,
+		order_ids: Optional[List[int]] = None,
+		created_from: Optional[datetime] = None,
+		created_to: Optional[datetime] = None,
+		limit: Optional[int] = None,
+		session=None
+	) -> Tuple[List[int], Dict[int, Optional[OrderStatus]]]:
+		previous_status = PREVIOUS_STATUS.get(new_status)
+		if order_ids is not None:
+			locked = select(Order.id).where(
+				Order.id == any_(
+					cast(bindparam('order_ids', value=order_ids), ARRAY(Integer))
+				),
+				Order.status == previous_status
+			).order_by(Order.id).with_for_update()
+		else:
+			# Workers sharing a filter take disjoint batches instead of
+			# waiting for each other.
+			locked = self.build_query(
+				model=Order,
+				conditions=self._order_conditions(
+					[previous_status],
+					created_from,
+					created_to
+				),
+				order_by=(Order.created_at, Order.id),
+				limit=limit
+			).with_only_columns(Order.id).with_for_update(skip_locked=True)
+		locked = locked.cte('locked')
 
+		async with transaction(session) as session:
+			orders = []
+			if previous_status:
+				orders = await self.update(
+					model=Order,
+					condition=and_(
+						Order.id == locked.c.id,
+						Order.status == previous_status
+					),
+					session=session,
+					many=True,
+					synchronize_session=False,
+					status=new_status,
+					version=Order.version + 1
+				)
+			applied = sorted(
+				orders,
+				key=lambda order: (order.created_at, order.id)
+			)
+			applied = [order.id for order in applied]
+			if applied:
+				await outbox_crud.add_many(
+					'order.status_changed',
+					self._order_documents(
+						select(Order).where(
+							Order.id == any_(
+								cast(
+									bindparam('applied_ids', value=applied),
+									ARRAY(Integer)
+								)
+							)
+						).subquery('page')
+					).subquery('documents'),
+					session=session
+				)
+
+			rejected = {}
+			if order_ids is not None:
+				applied_ids = set(applied)
+				applied = [
+					order_id for order_id in order_ids if order_id in applied_ids
+				]
+				rejected_ids = [
+					order_id
+					for order_id in order_ids
+					if order_id not in applied_ids
+				]
+				if rejected_ids:
+					statuses = dict((await session.execute(
+						select(Order.id, Order.status).where(
+							Order.id.in_(rejected_ids)
+						)
+					)).all())
+					rejected = {
+						order_id: statuses.get(order_id)
+						for order_id in rejected_ids
+					}
 
-product_crud = ProductCRUD()
+		return applied, rejected
+
+
+product_crud = ProductCRUD(
+	cache=ReadThroughCache(
+		LRUCache(
+			maxsize=settings.product_cache_size,
+			ttl=settings.product_cache_ttl
+		)
+	)
+)
 order_crud = OrderCRUD()
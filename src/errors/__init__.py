@@ -1,4 +1,8 @@
-from .errors import InsufficientStockError
+from .errors import (
+	InsufficientStockError,
+	VersionConflictError
+)
 __all__ = {
-	'InsufficientStockError'
+	'InsufficientStockError',
+	'VersionConflictError'
 }
\ No newline at end of file
@@ -14,3 +14,20 @@ class InsufficientStockError(Exception):
 			f"Requested: {requested_quantity}"
 		)
 		super().__init__(self.msg)
+
+
+class VersionConflictError(Exception):
+	def __init__(
+		self,
+		resource: str,
+		resource_id: int,
+		version: int
+	):
+		self.resource = resource
+		self.resource_id = resource_id
+		self.version = version
+		self.msg = (
+			f"{resource} ID {resource_id} is at version {version}, "
+			f"which does not match If-Match"
+		)
+		super().__init__(self.msg)
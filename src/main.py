@@ -1,17 +1,33 @@
 # Third Party Library
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
 
-from fastapi_common.db import init_db
+from fastapi_common.contextmanagers import integrity_error_handler
+from fastapi_common.db import (
+	create_engine,
+	init_db,
+)
+from fastapi_common.instrumentation import (
+	RequestTimingMiddleware,
+	TimedORJSONResponse,
+	instrument_engine,
+)
+from fastapi_common.metrics import (
+	MetricsMiddleware,
+	metrics_response,
+	register_cache,
+)
 
 # Application Library
 from .api import router
 from .conf import settings
+from .crud.product import product_crud
+from .middleware import log_request
 
 app = FastAPI(
 	title=settings.project,
-	default_response_class=ORJSONResponse,
+	default_response_class=TimedORJSONResponse,
 )
 
 app.add_middleware(
@@ -22,9 +38,31 @@ app.add_middleware(
 	allow_credentials=True
 )
 
+if settings.request_timing:
+	app.add_middleware(
+		RequestTimingMiddleware,
+		on_finish=log_request,
+		track_statements=bool(settings.sql_repeated_statement_threshold)
+	)
+
+if settings.metrics_enabled:
+	app.add_middleware(MetricsMiddleware)
+	register_cache('product', product_crud.cache)
+
+	@app.get('/metrics', include_in_schema=False)
+	def metrics():
+		return metrics_response()
+
+app.add_exception_handler(IntegrityError, integrity_error_handler)
+
 app.include_router(router)
 
 
 @app.on_event('startup')
 async def startup():
-	init_db(settings.database_dsn)
+	init_db(settings.database_dsn, **settings.engine_options)
+	if settings.request_timing:
+		instrument_engine(
+			create_engine(settings.database_dsn).sync_engine,
+			slow_statement_ms=settings.sql_slow_statement_ms
+		)
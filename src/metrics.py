@@ -0,0 +1,11 @@
+# Third Party Library
+from prometheus_client import Counter
+
+__all__ = [
+	'INSUFFICIENT_STOCK',
+]
+
+INSUFFICIENT_STOCK = Counter(
+	'insufficient_stock_total',
+	'Stock reservations rejected with InsufficientStockError'
+)
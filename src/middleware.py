@@ -0,0 +1,56 @@
+# Application Library
+from fastapi_common.instrumentation import RequestStats
+
+from .conf import settings
+from .logger import get_logger
+
+__all__ = [
+	'log_request',
+]
+
+logger = get_logger()
+
+
+async def log_request(
+	scope: dict,
+	status_code: int,
+	stats: RequestStats,
+	total: float
+) -> None:
+	fields = {
+		'method': scope['method'],
+		'path': scope['path'],
+		'status_code': status_code,
+		'queries': stats.queries,
+		'db_ms': round(stats.db_time * 1000, 2),
+		'pool_ms': round(stats.pool_wait * 1000, 2),
+		'serialize_ms': round(stats.serialization * 1000, 2),
+		'total_ms': round(total * 1000, 2),
+	}
+	logger.info(
+		'{method} {path} {status_code} queries={queries} db={db_ms}ms '
+		'pool={pool_ms}ms serialize={serialize_ms}ms total={total_ms}ms',
+		**fields
+	)
+
+	for statement, duration in stats.slow_statements:
+		logger.warning(
+			'Slow statement in {method} {path} ({duration_ms}ms): {statement}',
+			method=fields['method'],
+			path=fields['path'],
+			duration_ms=round(duration * 1000, 2),
+			statement=statement
+		)
+
+	if settings.sql_repeated_statement_threshold:
+		for statement, count in stats.repeated_statements(
+			settings.sql_repeated_statement_threshold
+		):
+			logger.warning(
+				'Possible N+1 in {method} {path}, statement ran {count} '
+				'times: {statement}',
+				method=fields['method'],
+				path=fields['path'],
+				count=count,
+				statement=statement
+			)
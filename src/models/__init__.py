@@ -1,11 +1,25 @@
+from .analytics import (
+	DailySales,
+	ProductDailySales,
+	RollupWatermark
+)
+from .idempotency import IdempotencyKey
+from .outbox import OutboxEvent
 from .products import (
 	Product,
 	Order,
-	OrderItem
+	OrderItem,
+	ProductStockShard
 )
 
 __all__ = [
 	'Product',
 	'Order',
 	'OrderItem',
+	'ProductStockShard',
+	'DailySales',
+	'ProductDailySales',
+	'RollupWatermark',
+	'IdempotencyKey',
+	'OutboxEvent',
 ]
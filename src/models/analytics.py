@@ -0,0 +1,87 @@
+# Third Party Library
+from sqlalchemy import (
+	BigInteger,
+	Column,
+	Date,
+	DateTime,
+	Float,
+	Integer,
+	String,
+)
+
+# Application Library
+from fastapi_common.db.base import BaseModel
+
+
+class DailySales(BaseModel):
+	__tablename__ = 'daily_sales'
+
+	day = Column(
+		Date,
+		primary_key=True
+	)
+	order_count = Column(
+		Integer,
+		nullable=False
+	)
+	item_count = Column(
+		BigInteger,
+		nullable=False
+	)
+	revenue = Column(
+		Float,
+		nullable=False
+	)
+
+	def __repr__(
+		self
+	):
+		return f"<DailySales(day={self.day}, revenue={self.revenue})>"
+
+
+class ProductDailySales(BaseModel):
+	__tablename__ = 'product_daily_sales'
+
+	day = Column(
+		Date,
+		primary_key=True
+	)
+	product_id = Column(
+		Integer,
+		primary_key=True
+	)
+	quantity = Column(
+		BigInteger,
+		nullable=False
+	)
+	revenue = Column(
+		Float,
+		nullable=False
+	)
+
+	def __repr__(
+		self
+	):
+		return f"<ProductDailySales(day={self.day}, product_id={self.product_id}, quantity={self.quantity})>"
+
+
+class RollupWatermark(BaseModel):
+	__tablename__ = 'rollup_watermarks'
+
+	name = Column(
+		String(64),
+		primary_key=True
+	)
+	last_order_id = Column(
+		Integer,
+		nullable=False
+	)
+	refreshed_at = Column(
+		DateTime,
+		nullable=False
+	)
+
+	def __repr__(
+		self
+	):
+		return f"<RollupWatermark(name={self.name}, last_order_id={self.last_order_id})>"
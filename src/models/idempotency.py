@@ -0,0 +1,53 @@
+# Third Party Library
+from sqlalchemy import (
+	Column,
+	DateTime,
+	Index,
+	Integer,
+	LargeBinary,
+	String,
+)
+
+# Application Library
+from fastapi_common.db.base import BaseModel
+
+
+class IdempotencyKey(BaseModel):
+	__tablename__ = 'idempotency_keys'
+	__table_args__ = (
+		Index('ix_idempotency_keys_expires_at', 'expires_at'),
+	)
+
+	scope = Column(
+		String(64),
+		primary_key=True
+	)
+	key = Column(
+		String(255),
+		primary_key=True
+	)
+	request_hash = Column(
+		String(64),
+		nullable=False
+	)
+	status_code = Column(
+		Integer,
+		nullable=False
+	)
+	body = Column(
+		LargeBinary,
+		nullable=False
+	)
+	created_at = Column(
+		DateTime,
+		nullable=False
+	)
+	expires_at = Column(
+		DateTime,
+		nullable=False
+	)
+
+	def __repr__(
+		self
+	):
+		return f"<IdempotencyKey(scope={self.scope}, key={self.key}, status_code={self.status_code})>"
@@ -0,0 +1,71 @@
+# Standard Library
+from datetime import datetime
+
+# Third Party Library
+from sqlalchemy import (
+	BigInteger,
+	Column,
+	DateTime,
+	Index,
+	Integer,
+	String,
+	Text,
+	text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Application Library
+from fastapi_common.db.base import BaseModel
+
+
+class OutboxEvent(BaseModel):
+	__tablename__ = 'outbox_events'
+	__table_args__ = (
+		# Only pending events are polled; dead ones stay for inspection.
+		Index(
+			'ix_outbox_events_pending',
+			'available_at',
+			'id',
+			postgresql_where=text('failed_at IS NULL')
+		),
+	)
+
+	id = Column(
+		BigInteger,
+		primary_key=True
+	)
+	topic = Column(
+		String(64),
+		nullable=False
+	)
+	payload = Column(
+		JSONB,
+		nullable=False
+	)
+	created_at = Column(
+		DateTime,
+		default=datetime.utcnow,
+		nullable=False
+	)
+	available_at = Column(
+		DateTime,
+		default=datetime.utcnow,
+		nullable=False
+	)
+	attempts = Column(
+		Integer,
+		nullable=False,
+		default=0,
+		server_default='0'
+	)
+	last_error = Column(
+		Text
+	)
+	failed_at = Column(
+		DateTime
+	)
+
+	def __repr__(
+		self
+	):
+		return f"<OutboxEvent(id={self.id}, topic={self.topic}, attempts={self.attempts})>"
@@ -10,7 +10,11 @@ from sqlalchemy import (
 	Float,
 	DateTime,
 	Enum,
-	ForeignKey
+	ForeignKey,
+	Index,
+	UniqueConstraint,
+	func,
+	text
 )
 from sqlalchemy.orm import relationship
 
@@ -18,6 +22,26 @@ from sqlalchemy.orm import relationship
 from fastapi_common.db.base import BaseModel
 
 
+# Inlined constants, a bound parameter would keep queries from matching
+# the expression index.
+SEARCH_CONFIG = text("'simple'::regconfig")
+
+
+def product_search_vector(
+	name,
+	description
+):
+	return func.setweight(
+		func.to_tsvector(SEARCH_CONFIG, name),
+		text("'A'")
+	).op('||')(
+		func.setweight(
+			func.to_tsvector(SEARCH_CONFIG, func.coalesce(description, text("''"))),
+			text("'B'")
+		)
+	)
+
+
 class OrderStatus(PyEnum):
 	IN_PROGRESS = "в процессе"
 	SHIPPED = "отправлен"
@@ -26,11 +50,13 @@ class OrderStatus(PyEnum):
 
 class Product(BaseModel):
 	__tablename__ = 'products'
+	__table_args__ = (
+		Index('ix_products_name_id', 'name', 'id'),
+	)
 
 	id = Column(
 		Integer,
-		primary_key=True,
-		index=True
+		primary_key=True
 	)
 	name = Column(
 		String(255),
@@ -48,6 +74,21 @@ class Product(BaseModel):
 		Integer,
 		nullable=False
 	)
+	# With shards the stock lives in product_stock_shards and
+	# stock_quantity is only refreshed by rebalancing.
+	stock_shards = Column(
+		Integer,
+		nullable=False,
+		default=0,
+		server_default='0'
+	)
+	# Bumped by every update, ETags are derived from it.
+	version = Column(
+		Integer,
+		nullable=False,
+		default=1,
+		server_default='1'
+	)
 
 	def __repr__(
 		self
@@ -55,26 +96,68 @@ class Product(BaseModel):
 		return f"<Product(id={self.id}, name={self.name}, price={self.price})>"
 
 
+Index(
+	'ix_products_search',
+	product_search_vector(Product.name, Product.description),
+	postgresql_using='gin'
+)
+Index(
+	'ix_products_name_trgm',
+	Product.name,
+	postgresql_using='gin',
+	postgresql_ops={'name': 'gin_trgm_ops'}
+)
+
+
 class Order(BaseModel):
 	__tablename__ = 'orders'
+	__table_args__ = (
+		Index('ix_orders_created_at_id', 'created_at', 'id'),
+		Index('ix_orders_status_created_at_id', 'status', 'created_at', 'id'),
+		Index(
+			'ix_orders_in_progress_created_at_id',
+			'created_at',
+			'id',
+			postgresql_where=text("status = 'IN_PROGRESS'")
+		),
+	)
 
 	id = Column(
 		Integer,
-		primary_key=True,
-		index=True
+		primary_key=True
 	)
 	created_at = Column(
 		DateTime,
-		default=datetime.utcnow
+		default=datetime.utcnow,
+		nullable=False
 	)
 	status = Column(
 		Enum(OrderStatus),
 		default=OrderStatus.IN_PROGRESS
 	)
+	total_amount = Column(
+		Float,
+		nullable=False,
+		default=0,
+		server_default='0'
+	)
+	item_count = Column(
+		Integer,
+		nullable=False,
+		default=0,
+		server_default='0'
+	)
+	version = Column(
+		Integer,
+		nullable=False,
+		default=1,
+		server_default='1'
+	)
 
 	items = relationship(
 		"OrderItem",
-		back_populates="order"
+		back_populates="order",
+		order_by="OrderItem.id"
 	)
 
 	def __repr__(
@@ -85,11 +168,18 @@ class Order(BaseModel):
 
 class OrderItem(BaseModel):
 	__tablename__ = 'order_items'
+	__table_args__ = (
+		UniqueConstraint(
+			'order_id',
+			'product_id',
+			name='uq_order_items_order_id_product_id'
+		),
+		Index('ix_order_items_product_id', 'product_id'),
+	)
 
 	id = Column(
 		Integer,
-		primary_key=True,
-		index=True
+		primary_key=True
 	)
 
 	order_id = Column(
@@ -106,6 +196,10 @@ class OrderItem(BaseModel):
 		Integer,
 		nullable=False
 	)
+	unit_price = Column(
+		Float,
+		nullable=False
+	)
 
 	# Relationships
 	order = relationship(
@@ -118,3 +212,26 @@ class OrderItem(BaseModel):
 		self
 	):
 		return f"<OrderItem(id={self.id}, order_id={self.order_id}, product_id={self.product_id}, quantity={self.quantity})>"
+
+
+class ProductStockShard(BaseModel):
+	__tablename__ = 'product_stock_shards'
+
+	product_id = Column(
+		Integer,
+		ForeignKey('products.id', ondelete='CASCADE'),
+		primary_key=True
+	)
+	shard = Column(
+		Integer,
+		primary_key=True
+	)
+	quantity = Column(
+		Integer,
+		nullable=False
+	)
+
+	def __repr__(
+		self
+	):
+		return f"<ProductStockShard(product_id={self.product_id}, shard={self.shard}, quantity={self.quantity})>"
@@ -0,0 +1,7 @@
+# Standard Library
+from enum import Enum
+
+
+class TopProductsMetric(str, Enum):
+	QUANTITY = 'quantity'
+	REVENUE = 'revenue'
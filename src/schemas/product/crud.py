@@ -1,4 +1,5 @@
 # Standard Library
+from enum import Enum
 from typing import List, Optional
 from datetime import datetime
 
@@ -9,6 +10,11 @@ from pydantic import BaseModel, Field
 from src.models.products import OrderStatus
 
 
+class ExportFormat(str, Enum):
+	NDJSON = 'ndjson'
+	CSV = 'csv'
+
+
 class ProductCreate(BaseModel):
 	name: str
 	description: Optional[str] = Field(None)
@@ -34,20 +40,49 @@ class ProductResponse(BaseModel):
 		orm_mode = True
 
 
+class ProductSearchMode(str, Enum):
+	FULLTEXT = 'fulltext'
+	AUTOCOMPLETE = 'autocomplete'
+
+
+class ProductSearchResult(ProductResponse):
+	rank: float
+
+
+class ProductImportRow(ProductCreate):
+	id: Optional[int] = Field(None, gt=0)
+	name: str = Field(..., max_length=255)
+	description: Optional[str] = Field(None, max_length=500)
+
+
+class ProductImportError(BaseModel):
+	row: int
+	errors: List[str]
+
+
+class ProductImportResponse(BaseModel):
+	inserted: int = 0
+	updated: int = 0
+	failed: int = 0
+	errors: List[ProductImportError] = Field(default_factory=list)
+	errors_truncated: bool = False
+
+
 class OrderItemCreate(BaseModel):
 	product_id: int = Field(...)
 	quantity: int = Field(..., ge=1)
 
 
 class OrderItemUpdate(BaseModel):
-	product_id: Optional[int] = Field(None)
-	quantity: Optional[int] = Field(None, ge=1)
+	product_id: int = Field(...)
+	quantity: int = Field(..., ge=1)
 
 
 class OrderItemResponse(BaseModel):
 	id: int
 	product_id: int
 	quantity: int
+	unit_price: float
 
 
 class OrderCreate(BaseModel):
@@ -60,10 +95,35 @@ class OrderUpdate(BaseModel):
 	items: Optional[List[OrderItemUpdate]] = Field(None)
 
 
+class OrderBatchGet(BaseModel):
+	ids: List[int] = Field(..., min_items=1)
+
+
+class OrderStatusBulkUpdate(BaseModel):
+	status: OrderStatus
+	ids: Optional[List[int]] = Field(None, min_items=1)
+	created_from: Optional[datetime] = Field(None)
+	created_to: Optional[datetime] = Field(None)
+	limit: int = Field(1000, gt=0)
+
+
+class OrderStatusRejection(BaseModel):
+	id: int
+	# Current status, None when there is no such order.
+	status: Optional[OrderStatus]
+
+
+class OrderStatusBulkResponse(BaseModel):
+	applied: List[int]
+	rejected: List[OrderStatusRejection]
+
+
 class OrderResponse(BaseModel):
 	id: int
 	created_at: datetime
 	status: OrderStatus
+	total_amount: float
+	item_count: int
 	items: List[OrderItemResponse] = Field(...)
 
 	class Config:
@@ -0,0 +1,41 @@
+# Standard Library
+import asyncio
+
+# Application Library
+from src.conf import settings
+from src.crud.analytics import analytics_crud
+from src.logger import get_logger
+
+__all__ = [
+	'refresh_rollups',
+	'run_rollup_refresher',
+]
+
+logger = get_logger()
+
+
+async def refresh_rollups() -> int:
+	total = 0
+	while True:
+		orders = await analytics_crud.refresh_rollups(
+			batch_size=settings.analytics_refresh_batch_size,
+			settle_seconds=settings.analytics_settle_seconds
+		)
+		total += orders
+		if orders < settings.analytics_refresh_batch_size:
+			return total
+
+
+async def run_rollup_refresher(
+	interval: float
+) -> None:
+	while True:
+		try:
+			orders = await refresh_rollups()
+			if orders:
+				logger.info('Rolled up {orders} orders', orders=orders)
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			logger.exception('Sales rollup refresh failed')
+		await asyncio.sleep(interval)
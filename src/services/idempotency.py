@@ -0,0 +1,25 @@
+# Standard Library
+import asyncio
+
+# Application Library
+from src.crud.idempotency import idempotency_crud
+from src.logger import get_logger
+
+__all__ = [
+	'run_idempotency_purger',
+]
+
+logger = get_logger()
+
+
+async def run_idempotency_purger(
+	interval: float
+) -> None:
+	while True:
+		try:
+			await idempotency_crud.purge_expired()
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			logger.exception('Purging expired idempotency keys failed')
+		await asyncio.sleep(interval)
@@ -0,0 +1,79 @@
+# Standard Library
+import asyncio
+from typing import (
+	Awaitable,
+	Callable,
+	Dict,
+	List,
+)
+
+# Application Library
+from fastapi_common.db import transaction
+from src.conf import settings
+from src.crud.outbox import outbox_crud
+from src.logger import get_logger
+
+__all__ = [
+	'Handlers',
+	'process_outbox',
+	'run_outbox_worker',
+]
+
+logger = get_logger()
+
+Handlers = Dict[str, List[Callable[[dict], Awaitable[None]]]]
+
+
+async def process_outbox(
+	handlers: Handlers
+) -> int:
+	async with transaction() as session:
+		events = await outbox_crud.claim(
+			settings.outbox_batch_size,
+			session=session
+		)
+		completed = []
+		for event in events:
+			try:
+				for handler in handlers.get(event.topic, ()):
+					await handler(event.payload)
+			except Exception as e:
+				# Delivery is at least once: every handler of the topic
+				# runs again on retry, so handlers must be idempotent.
+				retrying = await outbox_crud.retry_later(
+					event,
+					repr(e),
+					max_attempts=settings.outbox_max_attempts,
+					backoff=settings.outbox_retry_backoff,
+					max_backoff=settings.outbox_retry_backoff_max,
+					session=session
+				)
+				logger.opt(exception=e).log(
+					'WARNING' if retrying else 'ERROR',
+					'Outbox event {id} ({topic}) failed, attempt {attempt}',
+					id=event.id,
+					topic=event.topic,
+					attempt=event.attempts + 1
+				)
+			else:
+				completed.append(event.id)
+		await outbox_crud.complete(completed, session=session)
+
+	return len(events)
+
+
+async def run_outbox_worker(
+	handlers: Handlers,
+	poll_interval: float
+) -> None:
+	while True:
+		try:
+			events = await process_outbox(handlers)
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			logger.exception('Outbox batch failed')
+			events = 0
+		# A full batch means there is probably more waiting.
+		if events < settings.outbox_batch_size:
+			await asyncio.sleep(poll_interval)
@@ -0,0 +1,35 @@
+# Standard Library
+import asyncio
+
+# Application Library
+from src.crud.product import product_crud
+from src.logger import get_logger
+
+__all__ = [
+	'rebalance_stock',
+	'run_stock_rebalancer',
+]
+
+logger = get_logger()
+
+
+async def rebalance_stock() -> int:
+	# One transaction per product, shards are locked only briefly.
+	rebalanced = 0
+	for product_id in await product_crud.list_sharded_products():
+		rebalanced += await product_crud.rebalance_stock(product_id)
+
+	return rebalanced
+
+
+async def run_stock_rebalancer(
+	interval: float
+) -> None:
+	while True:
+		try:
+			await rebalance_stock()
+		except asyncio.CancelledError:
+			raise
+		except Exception:
+			logger.exception('Stock shard rebalancing failed')
+		await asyncio.sleep(interval)
@@ -0,0 +1,33 @@
+# Application Library
+from src.logger import get_logger
+from src.services.outbox import Handlers
+
+__all__ = [
+	'ORDER_EVENT_HANDLERS',
+]
+
+logger = get_logger()
+
+ORDER_TOPICS = (
+	'order.created',
+	'order.updated',
+	'order.status_changed',
+	'order.deleted',
+)
+
+
+async def log_order_event(
+	payload: dict
+) -> None:
+	logger.info(
+		'Order {id} is {status}, {item_count} items, total {total_amount}',
+		**payload
+	)
+
+
+# Notifications, search indexing and the like subscribe here, they run
+# in the outbox worker instead of the request.
+ORDER_EVENT_HANDLERS: Handlers = {
+	topic: [log_order_event]
+	for topic in ORDER_TOPICS
+}
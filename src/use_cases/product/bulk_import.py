@@ -0,0 +1,86 @@
+# Standard Library
+from typing import (
+	AsyncIterator,
+	List,
+	Tuple,
+	Union,
+)
+
+# Third Party Library
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+
+# Application Library
+from fastapi_common.db import MAX_BIND_PARAMS
+from fastapi_common.streaming import batched
+from src.conf import settings
+from src.crud.product import product_crud
+from src.models import Product
+from src.schemas.product.crud import (
+	ProductImportError,
+	ProductImportResponse,
+	ProductImportRow,
+)
+
+
+def _format_validation_error(
+	error: ValidationError
+) -> List[str]:
+	return [
+		f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}"
+		for item in error.errors()
+	]
+
+
+def _add_error(
+	report: ProductImportResponse,
+	row: int,
+	errors: List[str]
+) -> None:
+	report.failed += 1
+	if len(report.errors) < settings.product_import_max_errors:
+		report.errors.append(ProductImportError(row=row, errors=errors))
+	else:
+		report.errors_truncated = True
+
+
+async def import_products(
+	rows: AsyncIterator[Tuple[int, Union[dict, ValueError]]],
+	chunk_size: int = None
+) -> ProductImportResponse:
+	report = ProductImportResponse()
+	# Each row binds a parameter per column, defaults included.
+	chunk_size = min(
+		chunk_size or settings.product_import_chunk_size,
+		MAX_BIND_PARAMS // len(Product.__table__.columns)
+	)
+
+	async for chunk in batched(rows, chunk_size):
+		valid_rows = []
+		for number, value in chunk:
+			if isinstance(value, ValueError):
+				_add_error(report, number, [str(value)])
+				continue
+			try:
+				product = ProductImportRow(**value)
+			except ValidationError as e:
+				_add_error(report, number, _format_validation_error(e))
+				continue
+			valid_rows.append((number, product.dict()))
+
+		if not valid_rows:
+			continue
+
+		try:
+			inserted, updated = await product_crud.bulk_upsert(
+				[row for _, row in valid_rows]
+			)
+		except DBAPIError as e:
+			for number, _ in valid_rows:
+				_add_error(report, number, [str(e.orig)])
+			continue
+
+		report.inserted += inserted
+		report.updated += updated
+
+	return report
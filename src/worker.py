@@ -0,0 +1,35 @@
+# Standard Library
+import asyncio
+
+# Application Library
+from fastapi_common.db import init_db
+from src.conf import settings
+from src.services.analytics import run_rollup_refresher
+from src.services.idempotency import run_idempotency_purger
+from src.services.outbox import run_outbox_worker
+from src.services.stock import run_stock_rebalancer
+from src.use_cases.order.events import ORDER_EVENT_HANDLERS
+
+
+async def run() -> None:
+	# Periodic jobs run here, once, rather than in every web worker
+	# where they would repeat the same work and contend for its locks.
+	jobs = [
+		run_outbox_worker(ORDER_EVENT_HANDLERS, settings.outbox_poll_interval),
+	]
+	if settings.analytics_refresh_interval:
+		jobs.append(run_rollup_refresher(settings.analytics_refresh_interval))
+	if settings.idempotency_purge_interval:
+		jobs.append(run_idempotency_purger(settings.idempotency_purge_interval))
+	if settings.stock_rebalance_interval:
+		jobs.append(run_stock_rebalancer(settings.stock_rebalance_interval))
+	await asyncio.gather(*jobs)
+
+
+def main():
+	init_db(settings.database_dsn, **settings.engine_options)
+	asyncio.run(run())
+
+
+if __name__ == '__main__':
+	main()